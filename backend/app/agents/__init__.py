@@ -1,3 +1,25 @@
-from app.agents.verifier import VerifierAgent
-from app.agents.reasoner import ReasonerAgent
-from app.agents.base import BaseAgent
+"""
+Agents are registered lazily: their modules (and the model clients they pull
+in) are imported on first use rather than when this package is imported.
+"""
+from importlib import import_module
+
+from app.agents.registry import get_agent, register_agent
+
+register_agent("reasoner", lambda: import_module("app.agents.reasoner").ReasonerAgent)
+register_agent("verifier", lambda: import_module("app.agents.verifier").VerifierAgent)
+register_agent("batch_verifier", lambda: import_module("app.agents.verifier").BatchVerifierAgent)
+register_agent("base", lambda: import_module("app.agents.base").build_base_agent())
+
+_LAZY_ATTRIBUTES = {
+    "ReasonerAgent": "reasoner",
+    "VerifierAgent": "verifier",
+    "BaseAgent": "base",
+}
+
+
+def __getattr__(name: str):
+    # Keeps `from app.agents import ReasonerAgent` working without eager imports
+    if name in _LAZY_ATTRIBUTES:
+        return get_agent(_LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
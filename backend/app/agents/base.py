@@ -1,6 +1,12 @@
 import os
-from langchain.chat_models import init_chat_model
 
-os.environ["OPENAI_API_KEY"] = "sk-..."
 
-BaseAgent = init_chat_model("mistral", temperature=0.7)
\ No newline at end of file
+def build_base_agent():
+    """
+    Build the langchain chat model.
+    Called by the agent registry on first use; langchain is only imported then.
+    """
+    from langchain.chat_models import init_chat_model
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-...")
+    return init_chat_model("mistral", temperature=0.7)
@@ -1,6 +1,11 @@
+from typing import TYPE_CHECKING, Optional
 from app.config import LOCAL_MODEL
+from app.generation_profiles import get_generation_options
+from app.llm.local_llm import chat_text
 from app.prompts_loader import get_active_prompt
-from ollama import ChatResponse, chat
+
+if TYPE_CHECKING:
+    from app.graph.run_context import RunContext
 
 # Default system prompt (fallback if none in database)
 DEFAULT_SYSTEM_PROMPT = """
@@ -10,23 +15,31 @@ DEFAULT_SYSTEM_PROMPT = """
 """
 
 
-def ReasonerAgent(input_text: str):
+def ReasonerAgent(
+    input_text: str,
+    context: Optional["RunContext"] = None,
+    stage: str = "reasoner",
+    system_prompt: Optional[str] = None,
+):
     # Try to load from database, fall back to default
-    system_prompt = get_active_prompt("reasoner_system") or DEFAULT_SYSTEM_PROMPT
+    system_prompt = system_prompt or get_active_prompt("reasoner_system") or DEFAULT_SYSTEM_PROMPT
     
     userPrompt = f"""
         Task: {input_text}
         Provide a clear, structured answer.
     """
     
-    answer: ChatResponse = chat(
+    answer = chat_text(
         model=LOCAL_MODEL, 
         messages=[
             {'role': 'system', 'content': system_prompt},
             {'role': 'user', 'content': userPrompt}
-        ]
+        ],
+        context=context,
+        options=get_generation_options(stage),
+        stage=stage,
     )
-    if answer is None:
+    if not answer:
         return "No response generated"
     
-    return answer.message.content
+    return answer
@@ -0,0 +1,52 @@
+"""
+Lazy agent registry.
+
+Agents and the model clients they wrap are registered by name with a factory
+and only built on first use, so importing the application stays cheap.
+"""
+import threading
+from typing import Any, Callable, Dict, List
+
+_lock = threading.Lock()
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+
+
+def register_agent(name: str, factory: Callable[[], Any]) -> None:
+    """
+    Register an agent factory under a name.
+    Re-registering a name replaces the factory and drops any built instance.
+
+    Args:
+        name: Registry key (e.g., 'reasoner', 'verifier')
+        factory: Zero-argument callable that builds the agent
+    """
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def get_agent(name: str) -> Any:
+    """
+    Return the agent registered under `name`, building it on first use.
+
+    Raises:
+        KeyError: If no agent is registered under that name
+    """
+    agent = _instances.get(name)
+    if agent is not None:
+        return agent
+    with _lock:
+        if name not in _instances:
+            if name not in _factories:
+                raise KeyError(f"No agent registered under '{name}'")
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def built_agents() -> List[str]:
+    """
+    Names of the agents that have been built so far.
+    """
+    with _lock:
+        return sorted(_instances)
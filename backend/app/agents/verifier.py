@@ -1,7 +1,13 @@
+import json
+from typing import TYPE_CHECKING, List, Optional
 from app.llm.local_llm import LocalLLM, Query
 from app.config import VERIFIER_MODEL
+from app.generation_profiles import get_generation_options
 from app.prompts_loader import get_active_prompt
 
+if TYPE_CHECKING:
+    from app.graph.run_context import RunContext
+
 # Default system prompt (fallback if none in database)
 DEFAULT_SYSTEM_PROMPT = """
     You are a strict fact-checker and reviewer.
@@ -13,9 +19,27 @@ DEFAULT_SYSTEM_PROMPT = """
 """
 
 
-def VerifierAgent(input_text: Query):
+def parse_verdict(raw: str) -> dict:
+    """
+    Parse the verifier's JSON verdict.
+    Anything that is not a JSON object with a boolean 'ok' is treated as a failed check.
+    """
+    try:
+        verdict = json.loads(raw[raw.find("{"):raw.rfind("}") + 1])
+    except (TypeError, ValueError):
+        return {"ok": False}
+    if not isinstance(verdict, dict) or not isinstance(verdict.get("ok"), bool):
+        return {"ok": False}
+    return verdict
+
+
+def VerifierAgent(
+    input_text: Query,
+    context: Optional["RunContext"] = None,
+    system_prompt: Optional[str] = None,
+):
     # Try to load from database, fall back to default
-    system_prompt = get_active_prompt("verifier_system") or DEFAULT_SYSTEM_PROMPT
+    system_prompt = system_prompt or get_active_prompt("verifier_system") or DEFAULT_SYSTEM_PROMPT
     
     prompt = f"""
         Review the following answer:
@@ -33,4 +57,100 @@ def VerifierAgent(input_text: Query):
         model=VERIFIER_MODEL,
         system=system_prompt
     )
-    return LocalLLM(query)
+    raw = LocalLLM(
+        query,
+        context=context,
+        options=get_generation_options("verifier"),
+        format="json",
+        stage="verifier",
+    )
+    return parse_verdict(raw)
+
+
+def batch_format(count: int) -> dict:
+    """
+    JSON schema constraining a batched verification to exactly `count` verdicts.
+    """
+    return {
+        "type": "array",
+        "minItems": count,
+        "maxItems": count,
+        "items": {
+            "type": "object",
+            "properties": {
+                "index": {"type": "integer"},
+                "ok": {"type": "boolean"},
+                "issues": {"type": "string"},
+            },
+            "required": ["index", "ok", "issues"],
+        },
+    }
+
+
+def parse_batch_verdicts(raw: str, count: int) -> List[Optional[dict]]:
+    """
+    Parse a batched verification into one verdict per answer.
+    Verdicts are matched by their 'index' (1-based), falling back to their
+    position; answers without a usable verdict get None.
+    """
+    verdicts: List[Optional[dict]] = [None] * count
+    try:
+        items = json.loads(raw[raw.find("["):raw.rfind("]") + 1])
+    except (TypeError, ValueError):
+        return verdicts
+    if not isinstance(items, list):
+        return verdicts
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("ok"), bool):
+            continue
+        index = item.get("index")
+        slot = index - 1 if isinstance(index, int) and 1 <= index <= count else position
+        if slot < count and verdicts[slot] is None:
+            verdicts[slot] = {"ok": item["ok"], "issues": item.get("issues") or ""}
+    return verdicts
+
+
+def BatchVerifierAgent(
+    answers: List[str],
+    context: Optional["RunContext"] = None,
+    system_prompt: Optional[str] = None,
+) -> List[Optional[dict]]:
+    """
+    Verify several answers with a single verifier call.
+    The system prompt is sent (and prefilled) once for the whole batch.
+
+    Returns:
+        One verdict per answer, in order (None where the model gave no usable verdict)
+    """
+    system_prompt = system_prompt or get_active_prompt("verifier_system") or DEFAULT_SYSTEM_PROMPT
+
+    numbered = "\n".join(
+        f'Answer {index}:\n"""\n{answer}\n"""' for index, answer in enumerate(answers, 1)
+    )
+    prompt = f"""
+        Review each of the following {len(answers)} answers independently.
+        {numbered}
+        Respond with a JSON array holding one verdict per answer, in order:
+        [
+        {{"index": 1, "ok": true | false, "issues": "short explanation if false"}},
+        ...
+        ]
+    """
+    # Room for every verdict, not just one
+    options = dict(get_generation_options("verifier"))
+    if options.get("num_predict", 0) > 0:
+        options["num_predict"] *= len(answers)
+
+    query = Query(
+        prompt=prompt,
+        model=VERIFIER_MODEL,
+        system=system_prompt
+    )
+    raw = LocalLLM(
+        query,
+        context=context,
+        options=options,
+        format=batch_format(len(answers)),
+        stage="verifier",
+    )
+    return parse_batch_verdicts(raw, len(answers))
@@ -1,3 +1,4 @@
+import os
 from enum import Enum
 
 class Mode(str, Enum):
@@ -13,3 +14,114 @@ VERIFIER_MODEL = "mistral:7b-instruct"
 
 MAX_LOCAL_TOKENS = 2048
 CLOUD_TOKEN_BUDGET = 20_000
+
+# Seconds between checks for a disconnected client while a generation runs
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Default per-stage generation options passed to Ollama.
+# Rows in the generation_profiles table override these field by field.
+# Stages that share a model should use the same num_ctx, otherwise Ollama
+# reloads the model whenever the context size changes.
+GENERATION_PROFILES = {
+    "reasoner": {
+        "num_predict": MAX_LOCAL_TOKENS,
+        "num_ctx": 4096,
+        "temperature": 0.7,
+        "top_p": 0.9,
+    },
+    "verifier": {
+        # The verdict is a tiny JSON object
+        "num_predict": 128,
+        "num_ctx": 4096,
+        "temperature": 0.0,
+    },
+    "correction": {
+        "num_predict": MAX_LOCAL_TOKENS,
+        "num_ctx": 4096,
+        "temperature": 0.3,
+        "top_p": 0.9,
+    },
+}
+
+# Seconds between checks for changes made by other worker processes; this
+# bounds how long a prompt activation takes to reach every worker
+SHARED_STATE_POLL_SECONDS = float(os.getenv("SHARED_STATE_POLL_SECONDS", "0.5"))
+# Workers that have not flushed metrics for this long are reported as gone,
+# and their rows are deleted
+WORKER_STALE_SECONDS = 30
+# Seconds between flushes of a worker's counters to the shared database. Each
+# flush is a commit that wakes every worker's watcher, so keep it well above
+# SHARED_STATE_POLL_SECONDS (and below WORKER_STALE_SECONDS / 3)
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Threads shared by all agent graph runs for executing independent nodes
+GRAPH_MAX_WORKERS = 16
+
+# Ollama endpoints, comma-separated; requests are balanced across them
+OLLAMA_HOSTS = [
+    host.strip()
+    for host in os.getenv(
+        "OLLAMA_HOSTS", os.getenv("OLLAMA_HOST", "http://localhost:11434")
+    ).split(",")
+    if host.strip()
+]
+# Seconds between background health checks of the Ollama hosts
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "5"))
+# Routing penalty (in outstanding requests) for a host without the model loaded
+OLLAMA_AFFINITY_WEIGHT = 2.0
+# Hosts to try per generation before giving up
+OLLAMA_MAX_ATTEMPTS = 3
+
+# Smallest JSON body (in bytes) worth gzip-compressing for clients that accept it
+GZIP_MIN_BYTES = 1024
+
+# Per-client rate limiting of the generation endpoints, in Ollama tokens
+# (prompt + completion). Clients are identified by RATE_LIMIT_API_KEY_HEADER
+# when it carries an allowed key, otherwise by IP address. 0 tokens per minute
+# disables it.
+RATE_LIMIT_TOKENS_PER_MINUTE = int(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "20000"))
+# Most tokens a client can spend in a burst after being idle
+RATE_LIMIT_BURST_TOKENS = int(os.getenv("RATE_LIMIT_BURST_TOKENS", "40000"))
+RATE_LIMIT_PATHS = ("/prompt", "/reason")
+RATE_LIMIT_API_KEY_HEADER = "X-API-Key"
+# Allowed API keys, as comma-separated SHA-256 hex digests (printf %s "$KEY" | sha256sum).
+# Unknown keys are ignored, so clients cannot get a fresh bucket per request.
+RATE_LIMIT_API_KEYS = frozenset(
+    digest.strip().lower()
+    for digest in os.getenv("RATE_LIMIT_API_KEYS", "").split(",")
+    if digest.strip()
+)
+
+# Append every graph execution to this gzip NDJSON file for offline replay
+# (see app.replay). Empty disables recording.
+TRACE_RECORD_PATH = os.getenv("TRACE_RECORD_PATH", "")
+# Records waiting to be written; further records are dropped when it is full
+TRACE_QUEUE_SIZE = 10_000
+
+# Server-side query history (stored in HISTORY_DATABASE_URL, see app.history)
+# Entries are written in batches of up to HISTORY_BATCH_SIZE, at most
+# HISTORY_FLUSH_SECONDS after the request
+HISTORY_BATCH_SIZE = 200
+HISTORY_FLUSH_SECONDS = 1.0
+HISTORY_QUEUE_SIZE = 10_000
+# Retention: entries older than this, or beyond the newest N per user, are pruned
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "30"))
+HISTORY_MAX_PER_USER = int(os.getenv("HISTORY_MAX_PER_USER", "1000"))
+# Seconds between retention runs in each worker (0 disables the periodic job)
+HISTORY_PRUNE_INTERVAL_SECONDS = float(os.getenv("HISTORY_PRUNE_INTERVAL_SECONDS", "3600"))
+# Optional header clients use to group their history by session
+SESSION_ID_HEADER = "X-Session-Id"
+
+# Micro-batching of verifier calls (see app.graph.verify_batcher): answers
+# arriving within the window share one verifier call. A window of 0 sends
+# every answer on its own.
+VERIFY_BATCH_WINDOW_MS = float(os.getenv("VERIFY_BATCH_WINDOW_MS", "30"))
+VERIFY_BATCH_MAX_SIZE = int(os.getenv("VERIFY_BATCH_MAX_SIZE", "8"))
+
+# Optimistic delivery (see app.revisions): finished revisions are kept this
+# long for clients to fetch, and a long-poll waits at most this long
+REVISION_TTL_SECONDS = 600
+MAX_REVISIONS = 10_000
+REVISION_LONG_POLL_SECONDS = 30
+# How often a worker re-reads a revision another worker is running
+REVISION_POLL_SECONDS = 0.5
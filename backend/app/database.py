@@ -2,7 +2,7 @@
 SQLAlchemy database configuration and session management.
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -34,6 +34,80 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+# Query history lives in its own SQLite file: it takes far more writes than
+# the prompts database, and every commit there wakes the shared state
+# watcher of each worker (see app.shared_state)
+HISTORY_DATABASE_URL = os.getenv(
+    "HISTORY_DATABASE_URL",
+    "sqlite:///./history.db"
+)
+
+# Default pool (one connection per thread), so the history writer and
+# request handlers reading history do not share a connection
+history_engine = create_engine(
+    HISTORY_DATABASE_URL,
+    connect_args={
+        "check_same_thread": False
+    } if "sqlite" in HISTORY_DATABASE_URL else {},
+)
+
+if "sqlite" in HISTORY_DATABASE_URL:
+    @event.listens_for(history_engine, "connect")
+    def _configure_history_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Readers do not block the writer; space freed by retention pruning
+        # can be returned to the OS (only takes effect for a new file)
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+HistorySessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=history_engine
+)
+
+# Separate metadata, so init_db() does not create history tables in the
+# prompts database and vice versa
+HistoryBase = declarative_base()
+
+
+# Answer revisions also get their own SQLite file: they are written on every
+# change of an optimistic answer, from a writer thread while request handlers
+# read them, which neither the shared StaticPool connection nor the shared
+# state watcher of the prompts database should have to absorb
+REVISIONS_DATABASE_URL = os.getenv(
+    "REVISIONS_DATABASE_URL",
+    "sqlite:///./revisions.db"
+)
+
+# Default pool (one connection per thread), like the history engine
+revisions_engine = create_engine(
+    REVISIONS_DATABASE_URL,
+    connect_args={
+        "check_same_thread": False
+    } if "sqlite" in REVISIONS_DATABASE_URL else {},
+)
+
+if "sqlite" in REVISIONS_DATABASE_URL:
+    @event.listens_for(revisions_engine, "connect")
+    def _configure_revisions_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Workers reading a revision do not block the worker writing it
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+RevisionsSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=revisions_engine
+)
+
+RevisionsBase = declarative_base()
+
+
 def get_db():
     """
     Dependency injection function for FastAPI route handlers.
@@ -52,3 +126,17 @@ def init_db():
     Call this during application startup.
     """
     Base.metadata.create_all(bind=engine)
+
+
+def init_history_db():
+    """
+    Initialize the query history tables.
+    """
+    HistoryBase.metadata.create_all(bind=history_engine)
+
+
+def init_revisions_db():
+    """
+    Initialize the answer revision tables.
+    """
+    RevisionsBase.metadata.create_all(bind=revisions_engine)
@@ -0,0 +1,62 @@
+"""
+Per-stage generation options (num_predict, num_ctx, sampling, stop sequences).
+
+Profiles are cached per worker and reloaded whenever the
+'generation_profiles' shared state version changes, so changes made through
+the /profiles endpoints apply to the next request without a restart.
+"""
+import json
+from typing import Optional
+from app.config import GENERATION_PROFILES
+from app.database import SessionLocal
+from app.models.generation_profile_model import GenerationProfile
+from app.shared_state import VersionedCache
+
+PROFILES_STATE_KEY = "generation_profiles"
+PROFILE_FIELDS = ("num_predict", "num_ctx", "temperature", "top_p", "top_k", "stop")
+
+
+def profile_overrides(profile: Optional[GenerationProfile]) -> dict:
+    """
+    Return the options explicitly set on a stored profile.
+    """
+    if profile is None:
+        return {}
+    overrides = {}
+    for field in PROFILE_FIELDS:
+        value = getattr(profile, field)
+        if value is None:
+            continue
+        overrides[field] = json.loads(value) if field == "stop" else value
+    return overrides
+
+
+_profile_overrides = VersionedCache(PROFILES_STATE_KEY)
+
+
+def _load_profile_overrides(stage: str) -> dict:
+    db = SessionLocal()
+    try:
+        profile = db.query(GenerationProfile).filter(GenerationProfile.stage == stage).first()
+        return profile_overrides(profile)
+    finally:
+        db.close()
+
+
+def get_generation_options(stage: str) -> dict:
+    """
+    Retrieve the effective Ollama options for a pipeline stage.
+    Database overrides are merged over the defaults in app.config.GENERATION_PROFILES.
+    
+    Args:
+        stage: The pipeline stage (e.g., 'reasoner', 'verifier', 'correction')
+    
+    Returns:
+        A dictionary suitable for the `options` argument of ollama's chat()
+    """
+    options = dict(GENERATION_PROFILES.get(stage, {}))
+    try:
+        options.update(_profile_overrides.get(stage, lambda: _load_profile_overrides(stage)))
+    except Exception as e:
+        print(f"Error retrieving generation profile {stage}: {e}")
+    return options
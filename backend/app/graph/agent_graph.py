@@ -1,12 +1,21 @@
-from app.llm.local_llm import Query
-from fastapi.routing import APIRouter
-from app.agents import ReasonerAgent, VerifierAgent, BaseAgent
+import logging
+from typing import Optional
+from app.agents import get_agent
+from app.config import VERIFY_BATCH_MAX_SIZE, VERIFY_BATCH_WINDOW_MS
+from app.agents.tool_router import route_tools
+from app.graph.engine import Graph, GraphRun, Node
+from app.graph.run_context import RunContext
+from app.graph.verify_batcher import VerificationBatcher
 from app.prompts_loader import get_active_prompt
 
-app = APIRouter()
+logger = logging.getLogger(__name__)
+
 MAX_CORRECTION_LOOPS = 1
 ISSUES = "Unspecified issues detected"
 
+# Concurrent runs share verifier calls
+verification_batcher = VerificationBatcher(VERIFY_BATCH_WINDOW_MS / 1000, VERIFY_BATCH_MAX_SIZE)
+
 # Default correction feedback prompt (fallback if none in database)
 DEFAULT_CORRECTION_PROMPT = (
     "The previous answer had issues: {feedback}\n\n"
@@ -14,25 +23,114 @@ DEFAULT_CORRECTION_PROMPT = (
 )
 
 
-@app.post("/reasoned")
-def run_reasone_dagent_graph(user_input: str):
-    reasonedAnswer = ReasonerAgent(user_input)
+# -----------------------------
+# Nodes
+# -----------------------------
+def load_prompts():
+    # None falls back to each agent's default system prompt
+    return (
+        get_active_prompt("reasoner_system"),
+        get_active_prompt("verifier_system"),
+        get_active_prompt("correction_feedback") or DEFAULT_CORRECTION_PROMPT,
+    )
+
+
+def retrieve(user_input: str):
+    return route_tools(user_input)
+
+
+def reason(user_input: str, reasoner_system: Optional[str], tools_context, context: RunContext):
+    task = user_input if not tools_context else f"{user_input}\n\nContext:\n{tools_context}"
+    draft = get_agent("reasoner")(task, context=context, system_prompt=reasoner_system)
+    context.answer = draft
+    context.notify()
+    return draft
+
+
+def verify(draft: str, verifier_system: Optional[str], context: RunContext):
+    return verification_batcher.verify(draft, system_prompt=verifier_system, context=context)
+
 
-    if reasonedAnswer is None:
-        return "No response generated"
-    
-    for _ in range(MAX_CORRECTION_LOOPS):
-        if reasonedAnswer is None:
+def correct(
+    user_input: str,
+    draft: str,
+    verdict: dict,
+    reasoner_system: Optional[str],
+    verifier_system: Optional[str],
+    correction_template: str,
+    context: RunContext,
+):
+    reasonedAnswer = draft
+    context.verdict = verdict
+    context.notify()
+    approved = False
+    for loop in range(MAX_CORRECTION_LOOPS):
+        if loop:
+            verdict = verify(reasonedAnswer, verifier_system, context)
+        if isinstance(verdict, dict) and verdict.get("ok") is True:
+            approved = True
             break
-        
-        query = Query(prompt=reasonedAnswer)
-        verdict = VerifierAgent(query)
         feedback = verdict.get("issues", ISSUES) if isinstance(verdict, dict) else ISSUES
-        
-        # Try to load correction prompt from database, fall back to default
-        correction_template = get_active_prompt("correction_feedback") or DEFAULT_CORRECTION_PROMPT
         correction_message = correction_template.format(feedback=feedback, user_input=user_input)
-        
-        reasonedAnswer = ReasonerAgent(correction_message)
-
+        reasonedAnswer = get_agent("reasoner")(
+            correction_message, context=context, stage="correction", system_prompt=reasoner_system
+        )
+        context.answer = reasonedAnswer
+        context.notify()
+    # The last correction is returned without another verification
+    context.verified = approved
+    context.notify()
     return reasonedAnswer
+
+
+# Prompt loading and retrieval are independent and run concurrently. Verdicts
+# are not memoized: drafts are sampled, and the verifier model and profile can
+# change at runtime.
+AGENT_GRAPH = Graph([
+    Node("load_prompts", load_prompts,
+         outputs=("reasoner_system", "verifier_system", "correction_template"),
+         timeout=5, retries=1),
+    Node("retrieve", retrieve, inputs=("user_input",), outputs=("tools_context",),
+         timeout=10, retries=1),
+    Node("reason", reason,
+         inputs=("user_input", "reasoner_system", "tools_context", "context"),
+         outputs=("draft",), retries=1, retry_backoff=0.5),
+    Node("verify", verify, inputs=("draft", "verifier_system", "context"),
+         outputs=("verdict",), retries=1, retry_backoff=0.5),
+    Node("correct", correct,
+         inputs=("user_input", "draft", "verdict", "reasoner_system", "verifier_system",
+                 "correction_template", "context"),
+         outputs=("answer",), retries=1, retry_backoff=0.5),
+])
+
+
+def run_agent_graph(user_input: str, context: Optional[RunContext] = None) -> GraphRun:
+    """
+    Run the agent graph and return every produced value with the execution trace.
+
+    When a run context is given, generations stop as soon as it is cancelled
+    and the best answer so far is recorded on it after every stage. Its done
+    callbacks run once the graph has returned, whether or not it succeeded.
+    """
+    context = context or RunContext()
+    try:
+        run = AGENT_GRAPH.run({"user_input": user_input}, context=context)
+        context.finished = True
+    finally:
+        logger.info(
+            "Agent graph trace: %s",
+            ", ".join(
+                f"{entry.node}={entry.status}"
+                + (f"({entry.duration:.3f}s)" if entry.duration is not None else "")
+                for entry in context.trace
+            ),
+        )
+        context.mark_done()
+    return run
+
+
+def run_reasone_dagent_graph(user_input: str, context: Optional[RunContext] = None):
+    """
+    Reason, verify and correct an answer to `user_input`.
+    """
+    return run_agent_graph(user_input, context).values["answer"]
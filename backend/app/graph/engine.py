@@ -0,0 +1,268 @@
+"""
+Small declarative DAG executor for the agent graph.
+
+Nodes declare the values they read (`inputs`) and the values they produce
+(`outputs`). A node starts as soon as all of its inputs are available, so
+independent nodes run concurrently on a shared thread pool. Each node has
+its own timeout and retry policy and can memoize its output by input
+values. Every run records a per-node execution trace.
+
+The run's context (if any) is available to nodes as the 'context' input.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import GRAPH_MAX_WORKERS
+from app.llm.local_llm import GenerationCancelled
+
+CONTEXT = "context"
+
+_executor = ThreadPoolExecutor(max_workers=GRAPH_MAX_WORKERS, thread_name_prefix="graph-node")
+
+
+class GraphError(Exception):
+    """
+    Raised when a node fails after exhausting its retries.
+    """
+
+    def __init__(self, node: str, cause: BaseException):
+        super().__init__(f"Node '{node}' failed: {cause}")
+        self.node = node
+        self.cause = cause
+
+
+class NodeTimeout(Exception):
+    pass
+
+
+@dataclass
+class Node:
+    """
+    A unit of work in the graph.
+
+    Attributes:
+        name: Unique node name, used in traces
+        fn: Called with the declared inputs as keyword arguments. Returns the
+            single output directly, or a tuple matching `outputs`
+        inputs: Names of the values the node reads
+        outputs: Names of the values the node produces
+        timeout: Seconds allowed per attempt (None = no limit). A timed-out
+            attempt's thread is abandoned, not interrupted
+        retries: Extra attempts after a failure or timeout
+        retry_backoff: Seconds to wait before each retry
+        memoize: Reuse outputs of earlier runs with identical (hashable) inputs
+    """
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_backoff: float = 0.0
+    memoize: bool = False
+
+
+@dataclass
+class NodeTrace:
+    """
+    Timing and outcome of one node in one run (times in seconds from run start).
+    """
+    node: str
+    status: str = "pending"
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    attempts: int = 0
+    memoized: bool = False
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def as_dict(self) -> dict:
+        return {
+            "node": self.node,
+            "status": self.status,
+            "started": round(self.started, 4) if self.started is not None else None,
+            "duration": round(self.duration, 4) if self.duration is not None else None,
+            "attempts": self.attempts,
+            "memoized": self.memoized,
+            "error": self.error,
+        }
+
+
+@dataclass
+class GraphRun:
+    """
+    Result of a graph run: every produced value plus the execution trace.
+    """
+    values: Dict[str, Any]
+    trace: List[NodeTrace] = field(default_factory=list)
+    duration: float = 0.0
+
+    def trace_dicts(self) -> List[dict]:
+        return [entry.as_dict() for entry in self.trace]
+
+
+class Graph:
+    """
+    A validated set of nodes that can be run repeatedly.
+    """
+
+    def __init__(self, nodes: List[Node], memo_size: int = 256):
+        self.nodes = {node.name: node for node in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Node names must be unique")
+        self._producers: Dict[str, str] = {}
+        for node in nodes:
+            for output in node.outputs:
+                if output in self._producers:
+                    raise ValueError(f"Value '{output}' is produced by more than one node")
+                self._producers[output] = node.name
+        self._memo: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._memo_size = memo_size
+        self._memo_lock = threading.Lock()
+
+    def run(self, initial: Dict[str, Any], context=None) -> GraphRun:
+        """
+        Run every node once, starting each as soon as its inputs are available.
+
+        Args:
+            initial: Values available before any node runs (e.g., 'user_input')
+            context: Optional RunContext; no new node starts once it is cancelled,
+                and its `trace` attribute is set to this run's trace
+
+        Raises:
+            GraphError: If a node fails after its retries
+            GenerationCancelled: If the context is cancelled
+        """
+        start = time.perf_counter()
+        values = dict(initial)
+        values[CONTEXT] = context
+        traces = {name: NodeTrace(name) for name in self.nodes}
+        if context is not None:
+            # Live view of the trace, still readable if the run fails or is abandoned
+            context.trace = list(traces.values())
+        self._check_inputs(values)
+        pending = dict(self.nodes)
+        running: Dict[Future, str] = {}
+
+        try:
+            while pending or running:
+                if context is not None:
+                    context.raise_if_cancelled()
+                for name, node in list(pending.items()):
+                    if all(value in values for value in node.inputs):
+                        del pending[name]
+                        traces[name].status = "running"
+                        traces[name].started = time.perf_counter() - start
+                        kwargs = {value: values[value] for value in node.inputs}
+                        future = _executor.submit(
+                            self._run_node, node, kwargs, traces[name], context
+                        )
+                        running[future] = name
+                if not running:
+                    raise ValueError(f"Unsatisfiable inputs for nodes: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    trace = traces[name]
+                    trace.finished = time.perf_counter() - start
+                    try:
+                        values.update(future.result())
+                        trace.status = "ok"
+                    except BaseException as e:
+                        cancelled = isinstance(e, GenerationCancelled)
+                        trace.status = "cancelled" if cancelled else "failed"
+                        trace.error = str(e)
+                        raise
+        finally:
+            for future, name in running.items():
+                future.cancel()
+                traces[name].status = "abandoned"
+
+        return GraphRun(
+            values=values, trace=list(traces.values()), duration=time.perf_counter() - start
+        )
+
+    def _check_inputs(self, initial: Dict[str, Any]) -> None:
+        for node in self.nodes.values():
+            for value in node.inputs:
+                if value not in initial and value not in self._producers and value != CONTEXT:
+                    raise ValueError(f"Node '{node.name}' reads '{value}', which nothing produces")
+
+    def _run_node(
+        self, node: Node, kwargs: Dict[str, Any], trace: NodeTrace, context
+    ) -> Dict[str, Any]:
+        memo_key = self._memo_key(node, kwargs)
+        if memo_key is not None:
+            with self._memo_lock:
+                if memo_key in self._memo:
+                    self._memo.move_to_end(memo_key)
+                    trace.memoized = True
+                    return dict(zip(node.outputs, self._memo[memo_key]))
+
+        for attempt in range(node.retries + 1):
+            trace.attempts = attempt + 1
+            if attempt:
+                time.sleep(node.retry_backoff)
+            if context is not None:
+                context.raise_if_cancelled()
+            try:
+                outputs = self._call(node, kwargs)
+                break
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                if attempt == node.retries:
+                    raise GraphError(node.name, e) from e
+
+        outputs = outputs if len(node.outputs) != 1 else (outputs,)
+        if len(outputs) != len(node.outputs):
+            raise GraphError(node.name, ValueError(f"Expected {len(node.outputs)} outputs"))
+        if memo_key is not None:
+            with self._memo_lock:
+                self._memo[memo_key] = tuple(outputs)
+                if len(self._memo) > self._memo_size:
+                    self._memo.popitem(last=False)
+        return dict(zip(node.outputs, outputs))
+
+    def _call(self, node: Node, kwargs: Dict[str, Any]) -> Any:
+        if node.timeout is None:
+            result = node.fn(**kwargs)
+        else:
+            # A dedicated thread, so a hung attempt never starves the shared pool
+            outcome: Dict[str, Any] = {}
+
+            def attempt():
+                try:
+                    outcome["result"] = node.fn(**kwargs)
+                except BaseException as e:
+                    outcome["error"] = e
+
+            thread = threading.Thread(target=attempt, name=f"graph-node-{node.name}", daemon=True)
+            thread.start()
+            thread.join(node.timeout)
+            if thread.is_alive():
+                raise NodeTimeout(f"Timed out after {node.timeout}s")
+            if "error" in outcome:
+                raise outcome["error"]
+            result = outcome["result"]
+        return () if not node.outputs else result
+
+    def _memo_key(self, node: Node, kwargs: Dict[str, Any]) -> Optional[Tuple]:
+        if not node.memoize:
+            return None
+        key = (node.name, tuple(sorted(item for item in kwargs.items() if item[0] != CONTEXT)))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
@@ -0,0 +1,132 @@
+"""
+Per-execution state shared between the HTTP layer and the agent graph.
+
+The HTTP layer uses it to cancel a run (client went away, deadline expired);
+the graph records its best answer so far so a partial result can be returned.
+"""
+import threading
+from typing import Callable, List, Optional
+
+from app.llm.local_llm import GenerationCancelled
+
+
+class RunContext:
+    """
+    Cancellation flag plus progress of one graph execution.
+
+    Attributes:
+        answer: Best answer produced so far (None until the reasoner finishes)
+        verdict: The verifier's verdict on the first answer (None until verified)
+        verified: True once the verifier approved the current answer
+        finished: True once the graph has returned
+        trace: Per-node execution trace of the graph run (see app.graph.engine)
+        prompt_tokens: Prompt tokens evaluated by Ollama for this run so far
+        completion_tokens: Tokens generated by Ollama for this run so far
+        generations: One entry per Ollama call (stage, model, tokens, seconds)
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._usage_lock = threading.Lock()
+        self._unbilled = 0
+        self.answer: Optional[str] = None
+        self.verdict: Optional[dict] = None
+        self.verified = False
+        self.finished = False
+        self.trace: list = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.generations: List[dict] = []
+        self._listeners: List[Callable[["RunContext"], None]] = []
+        self._done = False
+        self._done_callbacks: List[Callable[["RunContext"], None]] = []
+
+    def add_listener(self, listener: Callable[["RunContext"], None]) -> None:
+        """
+        Call `listener` with this context whenever the graph reports progress
+        (see notify). Listeners run on graph threads and must not block.
+        """
+        self._listeners.append(listener)
+
+    def notify(self) -> None:
+        """
+        Tell listeners that `answer`, `verdict` or `verified` changed.
+        """
+        for listener in list(self._listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                print(f"Error notifying run listener: {e}")
+
+    def add_done_callback(self, callback: Callable[["RunContext"], None]) -> None:
+        """
+        Call `callback` with this context once the graph has returned (right
+        away if it already has), and again whenever a node it abandoned records
+        usage after that. Used to bill tokens consumed after the response.
+        """
+        with self._usage_lock:
+            self._done_callbacks.append(callback)
+            done = self._done
+        if done:
+            self._run_done_callbacks([callback])
+
+    def mark_done(self) -> None:
+        """
+        Record that the graph has returned (or raised) and run the done callbacks.
+        """
+        with self._usage_lock:
+            self._done = True
+            callbacks = list(self._done_callbacks)
+        self._run_done_callbacks(callbacks)
+
+    def _run_done_callbacks(self, callbacks: List[Callable[["RunContext"], None]]) -> None:
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Error running run done callback: {e}")
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise GenerationCancelled("Generation cancelled")
+
+    def record_usage(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        stage: Optional[str] = None,
+        model: Optional[str] = None,
+        seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Add the tokens consumed by one generation.
+        """
+        with self._usage_lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self._unbilled += prompt_tokens + completion_tokens
+            self.generations.append({
+                "stage": stage,
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "seconds": round(seconds, 4) if seconds is not None else None,
+            })
+            late_callbacks = list(self._done_callbacks) if self._done else []
+        self._run_done_callbacks(late_callbacks)
+
+    def take_usage(self) -> int:
+        """
+        Return the tokens consumed since the last call, so requests sharing
+        this run (see app.graph.single_flight) are not billed twice.
+        """
+        with self._usage_lock:
+            tokens, self._unbilled = self._unbilled, 0
+            return tokens
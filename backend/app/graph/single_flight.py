@@ -0,0 +1,110 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+Concurrent callers that use the same key share one execution and all
+receive its result (or its exception).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app import metrics
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a user query for coalescing: collapse whitespace and ignore case.
+    """
+    return " ".join(query.split()).casefold()
+
+
+class FlightTimeout(Exception):
+    """
+    Raised to a waiter whose timeout expired before the shared execution finished.
+    Carries the flight's context so the caller can fall back to partial progress.
+    """
+
+    def __init__(self, context: Any):
+        super().__init__("Timed out waiting for in-flight execution")
+        self.context = context
+
+
+class _Flight:
+    def __init__(self, context: Any):
+        self.context = context
+        self.task: "Optional[asyncio.Future[Any]]" = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    Waiters are cancellation-safe: a cancelled (or timed out) waiter only stops
+    waiting, the shared execution keeps running for the others. The execution
+    itself is cancelled once its last waiter has gone away.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[Any], Awaitable[Any]],
+        context_factory: Callable[[], Any] = lambda: None,
+        timeout: Optional[float] = None,
+        on_join: Optional[Callable[[Any], None]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Run `fn` for `key`, or join the execution already in flight for it.
+
+        Args:
+            key: Hashable identity of the work (e.g., normalized query + prompt set)
+            fn: Coroutine factory called by the leader with the flight's context
+            context_factory: Builds the context object shared by all waiters
+            timeout: Seconds this waiter is willing to wait (None waits forever)
+            on_join: Called with the flight's context as soon as this call has
+                started or joined the execution, to observe its progress
+
+        Returns:
+            A tuple of (result, shared) where `shared` is True when this call
+            joined an existing execution instead of starting one.
+
+        Raises:
+            FlightTimeout: If `timeout` expires first; the execution keeps running
+                for other waiters.
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(context_factory())
+            flight.task = asyncio.ensure_future(fn(flight.context))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task, k=key, f=flight: self._forget(k, f))
+            metrics.incr(f"{self.name}.executions")
+        else:
+            metrics.incr(f"{self.name}.coalesced")
+
+        flight.waiters += 1
+        if on_join is not None:
+            on_join(flight.context)
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout), shared
+        except asyncio.TimeoutError:
+            raise FlightTimeout(flight.context) from None
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read the result; drop the flight right away
+                # so a new caller starts fresh instead of joining a cancelled one.
+                self._forget(key, flight)
+                flight.task.cancel()
+                metrics.incr(f"{self.name}.abandoned")
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
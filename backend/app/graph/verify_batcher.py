@@ -0,0 +1,195 @@
+"""
+Micro-batching of verifier calls.
+
+Verdicts are tiny, so a verifier call is dominated by per-request overhead
+(model setup and prefill of the system prompt). Answers submitted within
+VERIFY_BATCH_WINDOW_MS of each other with the same system prompt are
+verified together by one call to the batch verifier, and each caller gets
+its own verdict back.
+
+The first caller of a batch leads it: it waits for the window (or for the
+batch to fill up), runs the call in its own thread and hands the verdicts
+out to the others, which just wait.
+"""
+import threading
+import time
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app import metrics
+from app.agents import get_agent
+from app.graph.run_context import RunContext
+from app.llm.local_llm import GenerationCancelled, Query
+
+# How often waiting callers check whether they were cancelled
+WAIT_POLL_SECONDS = 0.05
+
+
+class _BatchContext:
+    """
+    Stands in for a RunContext in the batched generation: it is cancelled only
+    once every member is, and its token usage is split evenly between members.
+    """
+
+    def __init__(self, contexts: List[Optional[RunContext]]):
+        self.contexts = contexts
+
+    @property
+    def cancelled(self) -> bool:
+        return all(context is not None and context.cancelled for context in self.contexts)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise GenerationCancelled("Generation cancelled")
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int, **details) -> None:
+        count = len(self.contexts)
+        for position, context in enumerate(self.contexts):
+            if context is not None:
+                context.record_usage(
+                    prompt_tokens // count + (position < prompt_tokens % count),
+                    completion_tokens // count + (position < completion_tokens % count),
+                    **details,
+                )
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Tuple[str, Optional[RunContext]]] = []
+        self.results: List[Optional[dict]] = []
+        # Failure of an individual answer (e.g., its fallback call)
+        self.errors: List[Optional[BaseException]] = []
+        # Failure of the batched call itself, shared by every answer
+        self.error: Optional[BaseException] = None
+        self.created = time.monotonic()
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class VerificationBatcher:
+    """
+    Collects concurrent verifications into batched verifier calls.
+
+    Args:
+        window_seconds: How long the first answer of a batch waits for others
+            (0 disables batching)
+        max_batch_size: Answers per batch; a full batch is sent right away
+    """
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._open: Dict[Hashable, _Batch] = {}
+        self._sizes: Counter = Counter()
+        self._wait_seconds = 0.0
+
+    def verify(
+        self,
+        answer: str,
+        system_prompt: Optional[str] = None,
+        context: Optional[RunContext] = None,
+    ) -> dict:
+        """
+        Verify `answer`, batched with concurrent calls that use the same system prompt.
+
+        Raises:
+            GenerationCancelled: If `context` is cancelled before the verdict is ready
+        """
+        if self.window_seconds <= 0 or self.max_batch_size <= 1:
+            return get_agent("verifier")(
+                Query(prompt=answer), context=context, system_prompt=system_prompt
+            )
+
+        with self._lock:
+            batch = self._open.get(system_prompt)
+            leader = batch is None
+            if leader:
+                batch = self._open[system_prompt] = _Batch()
+            index = len(batch.items)
+            batch.items.append((answer, context))
+            if len(batch.items) >= self.max_batch_size:
+                # Closed to newcomers; the leader sends it now
+                del self._open[system_prompt]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_seconds)
+            with self._lock:
+                if self._open.get(system_prompt) is batch:
+                    del self._open[system_prompt]
+            self._run(batch, system_prompt)
+        else:
+            while not batch.done.wait(WAIT_POLL_SECONDS):
+                if context is not None:
+                    context.raise_if_cancelled()
+
+        if batch.error is not None:
+            raise batch.error
+        if batch.errors[index] is not None:
+            raise batch.errors[index]
+        return batch.results[index]
+
+    def _run(self, batch: _Batch, system_prompt: Optional[str]) -> None:
+        answers = [answer for answer, _ in batch.items]
+        contexts = [context for _, context in batch.items]
+        wait_seconds = time.monotonic() - batch.created
+        batch.results = [None] * len(answers)
+        batch.errors = [None] * len(answers)
+        try:
+            if len(answers) == 1:
+                batch.results = [get_agent("verifier")(
+                    Query(prompt=answers[0]), context=contexts[0], system_prompt=system_prompt
+                )]
+            else:
+                batch.results = get_agent("batch_verifier")(
+                    answers, context=_BatchContext(contexts), system_prompt=system_prompt
+                )
+                self._fall_back(batch, system_prompt)
+        except BaseException as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+            with self._lock:
+                self._sizes[len(answers)] += 1
+                self._wait_seconds += wait_seconds
+            metrics.incr("verify_batch.batches")
+            metrics.incr("verify_batch.items", len(answers))
+
+    def _fall_back(self, batch: _Batch, system_prompt: Optional[str]) -> None:
+        """
+        Verify individually whatever the batched call left unanswered. A
+        failure only affects its own answer; cancelled members are skipped.
+        """
+        for position, (answer, context) in enumerate(batch.items):
+            if batch.results[position] is not None:
+                continue
+            if context is not None and context.cancelled:
+                batch.errors[position] = GenerationCancelled("Generation cancelled")
+                continue
+            metrics.incr("verify_batch.fallbacks")
+            try:
+                batch.results[position] = get_agent("verifier")(
+                    Query(prompt=answer), context=context, system_prompt=system_prompt
+                )
+            except Exception as e:
+                batch.errors[position] = e
+
+    def stats(self) -> dict:
+        """
+        Batching settings and the batch sizes and waits seen so far.
+        """
+        with self._lock:
+            sizes = dict(sorted(self._sizes.items()))
+            wait_seconds = self._wait_seconds
+        batches = sum(sizes.values())
+        items = sum(size * count for size, count in sizes.items())
+        return {
+            "window_ms": round(self.window_seconds * 1000, 1),
+            "max_batch_size": self.max_batch_size,
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(items / batches, 2) if batches else None,
+            "mean_wait_ms": round(wait_seconds / batches * 1000, 1) if batches else None,
+            "batch_sizes": sizes,
+        }
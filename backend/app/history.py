@@ -0,0 +1,274 @@
+"""
+Server-side query history.
+
+Answered queries are queued by the request handlers and written by a
+background thread in batches (one transaction per batch), so requests
+never wait on the history database. The same thread periodically prunes
+entries older than HISTORY_RETENTION_DAYS and beyond HISTORY_MAX_PER_USER
+per user, deleting in small transactions so readers are never blocked for
+long, then returns the freed pages to the OS.
+
+Entries become visible to GET /history within HISTORY_FLUSH_SECONDS.
+
+Usage (e.g., from cron, in addition to the periodic job):
+    python -m app.history --prune
+"""
+import argparse
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import insert, text
+
+from app import metrics
+from app.config import (
+    HISTORY_BATCH_SIZE,
+    HISTORY_FLUSH_SECONDS,
+    HISTORY_MAX_PER_USER,
+    HISTORY_PRUNE_INTERVAL_SECONDS,
+    HISTORY_QUEUE_SIZE,
+    HISTORY_RETENTION_DAYS,
+    RATE_LIMIT_API_KEY_HEADER,
+    RATE_LIMIT_API_KEYS,
+    SESSION_ID_HEADER,
+)
+from app.database import HistorySessionLocal, history_engine, init_history_db
+from app.models.history_model import QueryHistory
+from app.rate_limit import request_client_key
+
+# Rows deleted per transaction while pruning
+PRUNE_CHUNK_SIZE = 5_000
+
+_writer: Optional["_Writer"] = None
+
+
+def request_identity(request: Request) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Identify who made a request, for storing and listing their history.
+
+    Returns:
+        A tuple of (user_id, session_id). The user is the client's API key
+        (stored hashed), or None unless it sent one listed in
+        RATE_LIMIT_API_KEYS: IP addresses are shared behind NATs and proxies,
+        so they never identify a history. The session is the optional
+        X-Session-Id header.
+    """
+    user_id = request_client_key(request, RATE_LIMIT_API_KEY_HEADER, RATE_LIMIT_API_KEYS)
+    if not user_id.startswith("key:"):
+        user_id = None
+    session_id = request.headers.get(SESSION_ID_HEADER) or None
+    return user_id, session_id[:100] if session_id else None
+
+
+def record(entry: dict) -> None:
+    """
+    Queue a history entry (QueryHistory column values) for writing.
+    A no-op unless the writer is running.
+    """
+    if _writer is None:
+        return
+    try:
+        _writer.queue.put_nowait(entry)
+    except queue.Full:
+        metrics.incr("history.dropped")
+
+
+def get_page(
+    user_id: str,
+    session_id: Optional[str] = None,
+    before: Optional[int] = None,
+    limit: int = 20,
+) -> Tuple[List[QueryHistory], Optional[int]]:
+    """
+    Fetch a page of a user's history, newest first.
+
+    Uses keyset pagination on the entry ID, so every page costs one index
+    range scan however deep the client pages.
+
+    Args:
+        user_id: User whose history to list
+        session_id: Only list this session's entries
+        before: Cursor returned with the previous page (entries older than it)
+        limit: Maximum entries to return
+
+    Returns:
+        A tuple of (entries, next cursor or None on the last page)
+    """
+    db = HistorySessionLocal()
+    try:
+        query = db.query(QueryHistory).filter(QueryHistory.user_id == user_id)
+        if session_id is not None:
+            query = query.filter(QueryHistory.session_id == session_id)
+        if before is not None:
+            query = query.filter(QueryHistory.id < before)
+        rows = query.order_by(QueryHistory.id.desc()).limit(limit + 1).all()
+    finally:
+        db.close()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def prune(
+    retention_days: float = HISTORY_RETENTION_DAYS,
+    max_per_user: int = HISTORY_MAX_PER_USER,
+) -> int:
+    """
+    Delete entries older than `retention_days` and each user's entries beyond
+    their newest `max_per_user`, then release the freed space.
+
+    Returns:
+        The number of deleted entries
+    """
+    deleted = 0
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted += _delete_in_chunks(
+        "SELECT id FROM query_history WHERE created_at < :cutoff LIMIT :chunk",
+        {"cutoff": cutoff},
+    )
+
+    with history_engine.connect() as connection:
+        users = connection.execute(
+            text("SELECT user_id FROM query_history GROUP BY user_id HAVING COUNT(*) > :cap"),
+            {"cap": max_per_user},
+        ).scalars().all()
+    for user_id in users:
+        with history_engine.connect() as connection:
+            boundary = connection.execute(
+                text(
+                    "SELECT id FROM query_history WHERE user_id = :user_id "
+                    "ORDER BY id DESC LIMIT 1 OFFSET :cap"
+                ),
+                {"user_id": user_id, "cap": max_per_user},
+            ).scalar()
+        if boundary is not None:
+            deleted += _delete_in_chunks(
+                "SELECT id FROM query_history WHERE user_id = :user_id AND id <= :boundary "
+                "LIMIT :chunk",
+                {"user_id": user_id, "boundary": boundary},
+            )
+
+    if deleted and history_engine.dialect.name == "sqlite":
+        with history_engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA incremental_vacuum")
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    metrics.incr("history.pruned", deleted)
+    return deleted
+
+
+def _delete_in_chunks(select_ids: str, params: dict) -> int:
+    deleted = 0
+    statement = text(f"DELETE FROM query_history WHERE id IN ({select_ids})")
+    while True:
+        with history_engine.begin() as connection:
+            count = connection.execute(statement, {**params, "chunk": PRUNE_CHUNK_SIZE}).rowcount
+        deleted += count
+        if count < PRUNE_CHUNK_SIZE:
+            return deleted
+
+
+class _Writer(threading.Thread):
+    def __init__(self):
+        super().__init__(name="history-writer", daemon=True)
+        self.queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=HISTORY_QUEUE_SIZE)
+
+    def run(self) -> None:
+        # Prune once at startup, then periodically (never if the interval is 0)
+        next_prune = time.monotonic() if HISTORY_PRUNE_INTERVAL_SECONDS > 0 else None
+        stopping = False
+        while not stopping:
+            timeout = None if next_prune is None else max(0.0, next_prune - time.monotonic())
+            batch, stopping = self._collect(timeout)
+            if batch:
+                self._write(batch)
+            if not stopping and next_prune is not None and time.monotonic() >= next_prune:
+                try:
+                    prune()
+                except Exception as e:
+                    print(f"Error pruning query history: {e}")
+                next_prune = time.monotonic() + HISTORY_PRUNE_INTERVAL_SECONDS
+
+    def _collect(self, timeout: Optional[float]) -> Tuple[List[dict], bool]:
+        """
+        Wait up to `timeout` (None = indefinitely) for an entry, then keep
+        collecting for up to HISTORY_FLUSH_SECONDS or HISTORY_BATCH_SIZE entries.
+
+        Returns:
+            A tuple of (entries, whether stop() was called)
+        """
+        batch: List[dict] = []
+        try:
+            entry = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return batch, False
+        deadline = time.monotonic() + HISTORY_FLUSH_SECONDS
+        while entry is not None:
+            batch.append(entry)
+            if len(batch) >= HISTORY_BATCH_SIZE:
+                break
+            try:
+                entry = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        return batch, entry is None
+
+    def _write(self, batch: List[dict]) -> None:
+        try:
+            with history_engine.begin() as connection:
+                connection.execute(insert(QueryHistory), batch)
+            metrics.incr("history.written", len(batch))
+        except Exception as e:
+            metrics.incr("history.dropped", len(batch))
+            print(f"Error writing query history: {e}")
+
+
+def start() -> None:
+    """
+    Create the history tables and start the background writer.
+    """
+    global _writer
+    if _writer is not None:
+        return
+    init_history_db()
+    _writer = _Writer()
+    _writer.start()
+
+
+def stop(timeout: float = 5.0) -> None:
+    """
+    Write out queued entries and stop the writer.
+    """
+    global _writer
+    writer, _writer = _writer, None
+    if writer is None:
+        return
+    deadline = time.monotonic() + timeout
+    try:
+        writer.queue.put(None, timeout=timeout)
+    except queue.Full:
+        return
+    writer.join(max(0.0, deadline - time.monotonic()))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Query history maintenance")
+    parser.add_argument("--prune", action="store_true", help="Apply the retention policy now")
+    parser.add_argument("--retention-days", type=float, default=HISTORY_RETENTION_DAYS)
+    parser.add_argument("--max-per-user", type=int, default=HISTORY_MAX_PER_USER)
+    args = parser.parse_args(argv)
+
+    init_history_db()
+    if args.prune:
+        started = time.perf_counter()
+        deleted = prune(args.retention_days, args.max_per_user)
+        print(f"Deleted {deleted} entries in {time.perf_counter() - started:.2f}s")
+    with history_engine.connect() as connection:
+        total = connection.execute(text("SELECT COUNT(*) FROM query_history")).scalar()
+    print(f"{total} entries in history")
+
+
+if __name__ == "__main__":
+    main()
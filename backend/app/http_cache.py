@@ -0,0 +1,74 @@
+"""
+Conditional GET support for read endpoints.
+
+Serialized response bodies are cached per worker together with a strong
+ETag. Clients that send a matching `If-None-Match` get a 304 without the
+endpoint touching the database or serializing anything.
+"""
+import gzip
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.config import GZIP_MIN_BYTES
+
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from the values that identify a representation.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+class CachedBody:
+    """
+    A serialized JSON response body, its ETag and (lazily) its gzipped form.
+    The gzipped form has its own ETag, since the bytes differ.
+    """
+
+    def __init__(self, content: Any, etag: str):
+        self.body = orjson.dumps(content)
+        self.etag = etag
+        self.gzip_etag = etag[:-1] + '-gzip"'
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def etag_matches(request: Request, *etags: str) -> bool:
+    """
+    Whether the request's If-None-Match header matches any of `etags` (weak comparison).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") in etags for candidate in header.split(","))
+
+
+def cached_response(request: Request, cached: CachedBody) -> Response:
+    """
+    Build a 304 or a (possibly gzipped) 200 response for a cached body.
+    """
+    accepts_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    gzipped = accepts_gzip and len(cached.body) >= GZIP_MIN_BYTES
+    etag = cached.gzip_etag if gzipped else cached.etag
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    # Either coding revalidates the same content
+    if etag_matches(request, cached.etag, cached.gzip_etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(cached.gzipped, media_type="application/json", headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
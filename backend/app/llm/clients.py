@@ -0,0 +1,46 @@
+"""
+Lazily constructed Ollama client pool.
+The ollama package (and its HTTP stack) is imported on the first model call.
+"""
+import threading
+from typing import TYPE_CHECKING, List, Optional
+
+from app.config import (
+    OLLAMA_AFFINITY_WEIGHT,
+    OLLAMA_HEALTH_INTERVAL,
+    OLLAMA_HOSTS,
+    OLLAMA_MAX_ATTEMPTS,
+)
+
+if TYPE_CHECKING:
+    from app.llm.pool import OllamaPool
+
+_lock = threading.Lock()
+_client: Optional["OllamaPool"] = None
+
+
+def get_client() -> "OllamaPool":
+    """
+    Return the shared Ollama pool, creating it on first use.
+    It balances requests across OLLAMA_HOSTS and mirrors `ollama.Client.chat`.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from app.llm.pool import OllamaPool
+
+                _client = OllamaPool(
+                    OLLAMA_HOSTS,
+                    health_interval=OLLAMA_HEALTH_INTERVAL,
+                    affinity_weight=OLLAMA_AFFINITY_WEIGHT,
+                    max_attempts=OLLAMA_MAX_ATTEMPTS,
+                )
+    return _client
+
+
+def pool_status() -> List[dict]:
+    """
+    Status of every Ollama host, or an empty list if no model call was made yet.
+    """
+    return _client.status() if _client is not None else []
@@ -0,0 +1,149 @@
+"""
+Minimal fake Ollama server for load-balancing, latency and replay testing.
+
+Implements the parts of the Ollama HTTP API the backend uses (/api/chat,
+streaming or not, /api/ps, /api/tags, /api/version) and generates filler
+text at a configurable speed, so several instances on different ports can
+stand in for a pool of GPU hosts.
+
+Usage:
+    python -m app.llm.fake_ollama --port 11501 --tokens-per-second 40
+    OLLAMA_HOSTS=http://localhost:11501,http://localhost:11502 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_OUTPUT_TOKENS = 64
+FILLER = "the quick brown fox jumps over the lazy dog".split()
+
+
+def create_app(
+    tokens_per_second: float = 50.0,
+    load_seconds: float = 0.0,
+    fail_rate: float = 0.0,
+    models: Optional[List[str]] = None,
+) -> FastAPI:
+    """
+    Build a fake Ollama app.
+
+    Args:
+        tokens_per_second: Generation speed of the fake model
+        load_seconds: Extra delay the first time each model is used
+        fail_rate: Probability that a chat request fails with a 500
+        models: Models reported as loaded from the start
+    """
+    app = FastAPI(title="Fake Ollama")
+    loaded = set(models or [])
+
+    def now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def prompt_tokens(messages: List[dict]) -> int:
+        return sum(len(str(m.get("content", "")).split()) for m in messages)
+
+    def completion(body: dict) -> List[str]:
+        options = body.get("options") or {}
+        limit = options.get("num_predict") or DEFAULT_OUTPUT_TOKENS
+        limit = DEFAULT_OUTPUT_TOKENS if limit < 0 else limit
+        output_format = body.get("format")
+        if output_format:
+            if isinstance(output_format, dict) and output_format.get("type") == "array":
+                count = output_format.get("minItems") or 1
+                verdicts = [{"index": i + 1, "ok": True, "issues": ""} for i in range(count)]
+                text = json.dumps(verdicts)
+            else:
+                text = json.dumps({"ok": True, "issues": ""})
+            return [text]
+        return [FILLER[i % len(FILLER)] + " " for i in range(min(limit, DEFAULT_OUTPUT_TOKENS))]
+
+    @app.get("/")
+    def root():
+        return "Ollama is running"
+
+    @app.get("/api/version")
+    def version():
+        return {"version": "0.0.0-fake"}
+
+    @app.get("/api/tags")
+    def tags():
+        return {"models": [{"name": m, "model": m} for m in sorted(loaded)]}
+
+    @app.get("/api/ps")
+    def ps():
+        return {"models": [{"name": m, "model": m} for m in sorted(loaded)]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        if random.random() < fail_rate:
+            return JSONResponse(status_code=500, content={"error": "fake failure"})
+        if model not in loaded:
+            await asyncio.sleep(load_seconds)
+            loaded.add(model)
+
+        tokens = completion(body)
+        prompt_eval_count = prompt_tokens(body.get("messages") or [])
+        delay = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+
+        def chunk(content: str, done: bool) -> dict:
+            data = {
+                "model": model,
+                "created_at": now(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+            if done:
+                data.update(
+                    done_reason="stop",
+                    prompt_eval_count=prompt_eval_count,
+                    eval_count=len(tokens),
+                )
+            return data
+
+        if not body.get("stream", True):
+            await asyncio.sleep(delay * len(tokens))
+            response = chunk("".join(tokens), True)
+            return JSONResponse(response)
+
+        async def generate():
+            for token in tokens:
+                await asyncio.sleep(delay)
+                yield json.dumps(chunk(token, False)) + "\n"
+            yield json.dumps(chunk("", True)) + "\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--load-seconds", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--models", default="", help="Comma-separated models loaded at start")
+    args = parser.parse_args(argv)
+
+    app = create_app(
+        tokens_per_second=args.tokens_per_second,
+        load_seconds=args.load_seconds,
+        fail_rate=args.fail_rate,
+        models=[m for m in args.models.split(",") if m],
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,107 @@
-from ollama import ChatResponse, chat
+import time
+from typing import TYPE_CHECKING, List, Optional, Union
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from fastapi import HTTPException
+from app.llm.clients import get_client
 
-app = FastAPI()
+if TYPE_CHECKING:
+    from ollama import ChatResponse
+    from app.graph.run_context import RunContext
 
 class Query(BaseModel):
     prompt: str
     model: str = "llama2"
     system: str = ""
 
-@app.post("/local_llm/")
-def LocalLLM(query: Query):
-    chatResponse: ChatResponse = chat(
-        model= query.model, 
-        messages=[
-            { 'role': 'system', 'content': query.system },
-            { 'role': 'user', 'content': query.prompt }
-        ]
+
+class GenerationCancelled(Exception):
+    """
+    Raised when a generation is stopped because its run was cancelled.
+    """
+
+
+def chat_text(
+    model: str,
+    messages: List[dict],
+    context: Optional["RunContext"] = None,
+    options: Optional[dict] = None,
+    format: Optional[Union[str, dict]] = None,
+    stage: Optional[str] = None,
+) -> str:
+    """
+    Run a chat completion and return the generated text.
+    `options` are Ollama generation options (num_predict, num_ctx, temperature, ...)
+    and `format` optionally constrains the output ('json' or a JSON schema).
+
+    With a run context the response is streamed and the context is checked
+    between chunks; on cancellation the stream is closed, which makes Ollama
+    stop generating, and GenerationCancelled is raised. The tokens Ollama
+    reports (prompt_eval_count/eval_count) are recorded on the context; a
+    cancelled stream is charged one token per chunk received. `stage` labels
+    the generation in the context's record (e.g., 'reasoner').
+    """
+    if context is None:
+        chatResponse: "ChatResponse" = get_client().chat(
+            model=model, messages=messages, options=options, format=format
+        )
+        if not chatResponse or not chatResponse.done:
+            raise HTTPException(
+                status_code = 500, 
+                detail = "No response from Ollama"
+            )
+        return chatResponse.message.content
+
+    context.raise_if_cancelled()
+    started = time.perf_counter()
+    stream = get_client().chat(
+        model=model, messages=messages, options=options, format=format, stream=True
     )
-    if not chatResponse or not chatResponse.done:
+    parts = []
+    done = False
+    prompt_tokens = 0
+    completion_tokens = 0
+    try:
+        for chunk in stream:
+            completion_tokens += 1
+            context.raise_if_cancelled()
+            parts.append(chunk.message.content or "")
+            done = chunk.done
+            if done:
+                prompt_tokens = chunk.prompt_eval_count or 0
+                completion_tokens = chunk.eval_count or completion_tokens
+    finally:
+        stream.close()
+        context.record_usage(
+            prompt_tokens,
+            completion_tokens,
+            stage=stage,
+            model=model,
+            seconds=time.perf_counter() - started,
+        )
+
+    if not done:
         raise HTTPException(
             status_code = 500, 
             detail = "No response from Ollama"
         )
-    
-    return chatResponse.message.content
\ No newline at end of file
+    return "".join(parts)
+
+
+def LocalLLM(
+    query: Query,
+    context: Optional["RunContext"] = None,
+    options: Optional[dict] = None,
+    format: Optional[Union[str, dict]] = None,
+    stage: Optional[str] = None,
+):
+    return chat_text(
+        model=query.model,
+        messages=[
+            { 'role': 'system', 'content': query.system },
+            { 'role': 'user', 'content': query.prompt }
+        ],
+        context=context,
+        options=options,
+        format=format,
+        stage=stage,
+    )
@@ -0,0 +1,222 @@
+"""
+Load balancing across several Ollama hosts.
+
+The pool exposes the same `chat()` call as `ollama.Client`. Each request is
+routed to the healthy host with the lowest score, where the score is the
+number of requests already outstanding on that host plus a penalty if the
+host does not have the model loaded (model affinity). A background thread
+health-checks every host and refreshes its loaded models via `/api/ps`.
+Failed generations are retried on another host: non-streaming calls at any
+point, streaming calls as long as nothing has been yielded yet.
+"""
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Set
+
+import httpx
+from ollama import Client, ResponseError
+
+from app import metrics
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed call may succeed on another host.
+    """
+    if isinstance(error, ResponseError):
+        return error.status_code >= 500
+    return isinstance(error, (ConnectionError, httpx.TransportError))
+
+
+class OllamaHost:
+    """
+    One Ollama endpoint and what the pool knows about it.
+    """
+
+    def __init__(self, url: str, health_timeout: float):
+        self.url = url
+        # Generations can run for minutes, so only health checks use a timeout
+        self.client = Client(host=url)
+        self.health_client = Client(host=url, timeout=health_timeout)
+        self.healthy = True
+        self.outstanding = 0
+        self.loaded_models: Set[str] = set()
+        self.failures = 0
+        self.last_checked: Optional[float] = None
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "loaded_models": sorted(self.loaded_models),
+            "failures": self.failures,
+            "last_checked": self.last_checked,
+        }
+
+
+class OllamaPool:
+    """
+    Routes chat calls across several Ollama hosts.
+
+    Args:
+        urls: Host URLs (e.g., ['http://gpu1:11434', 'http://gpu2:11434'])
+        health_interval: Seconds between background health checks
+        affinity_weight: Score penalty for a host that does not have the model
+            loaded, in units of outstanding requests
+        max_attempts: Hosts to try per call before giving up
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        health_interval: float = 5.0,
+        affinity_weight: float = 2.0,
+        max_attempts: int = 3,
+    ):
+        if not urls:
+            raise ValueError("OllamaPool needs at least one host")
+        self.hosts = [OllamaHost(url, health_timeout=max(health_interval, 1.0)) for url in urls]
+        self.health_interval = health_interval
+        self.affinity_weight = affinity_weight
+        self.max_attempts = max(1, min(max_attempts, len(self.hosts)))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stop = threading.Event()
+        # Also runs for a single host, which would otherwise never be marked healthy again
+        self._health_thread = threading.Thread(
+            target=self._health_loop, name="ollama-health", daemon=True
+        )
+        self._health_thread.start()
+
+    # -----------------------------
+    # Routing
+    # -----------------------------
+    def _acquire(self, model: str, exclude: Set[str]) -> OllamaHost:
+        with self._lock:
+            candidates = [h for h in self.hosts if h.url not in exclude]
+            healthy = [h for h in candidates if h.healthy]
+            # Health may be stale; if every host looks down, try them anyway
+            candidates = healthy or candidates
+            if not candidates:
+                raise ConnectionError("No Ollama hosts left to try")
+            # Rotate the starting point so ties are spread across hosts
+            self._next = (self._next + 1) % len(candidates)
+            rotated = candidates[self._next:] + candidates[:self._next]
+            host = min(
+                rotated,
+                key=lambda h: h.outstanding
+                + (0 if model in h.loaded_models else self.affinity_weight),
+            )
+            host.outstanding += 1
+            return host
+
+    def _release(self, host: OllamaHost) -> None:
+        with self._lock:
+            host.outstanding -= 1
+
+    def _succeeded(self, host: OllamaHost, model: str) -> None:
+        host.loaded_models.add(model)
+        host.failures = 0
+        host.healthy = True
+        metrics.incr(f"ollama.requests.{host.url}")
+
+    def _failed(self, host: OllamaHost, error: BaseException) -> None:
+        host.failures += 1
+        metrics.incr(f"ollama.failures.{host.url}")
+        if is_retryable(error):
+            host.healthy = False
+        print(f"Ollama host {host.url} failed: {error}")
+
+    # -----------------------------
+    # Client API
+    # -----------------------------
+    def chat(
+        self,
+        model: str = "",
+        messages=None,
+        *,
+        stream: bool = False,
+        idempotent: bool = True,
+        **kwargs,
+    ):
+        """
+        Same as `ollama.Client.chat`, routed to the best host.
+
+        Args:
+            idempotent: Allow retrying on another host after a failure
+        """
+        if stream:
+            return self._chat_stream(model, messages, idempotent, kwargs)
+
+        tried: Set[str] = set()
+        while True:
+            host = self._acquire(model, tried)
+            tried.add(host.url)
+            try:
+                response = host.client.chat(model=model, messages=messages, **kwargs)
+                self._succeeded(host, model)
+                return response
+            except Exception as e:
+                self._failed(host, e)
+                if not idempotent or not is_retryable(e) or len(tried) >= self.max_attempts:
+                    raise
+                metrics.incr("ollama.retries")
+            finally:
+                self._release(host)
+
+    def _chat_stream(self, model: str, messages, idempotent: bool, kwargs: dict) -> Iterator[Any]:
+        tried: Set[str] = set()
+        while True:
+            host = self._acquire(model, tried)
+            tried.add(host.url)
+            yielded = False
+            chunks = host.client.chat(model=model, messages=messages, stream=True, **kwargs)
+            try:
+                for chunk in chunks:
+                    yielded = True
+                    yield chunk
+                self._succeeded(host, model)
+                return
+            except Exception as e:
+                self._failed(host, e)
+                retryable = idempotent and not yielded and is_retryable(e)
+                if not retryable or len(tried) >= self.max_attempts:
+                    raise
+                metrics.incr("ollama.retries")
+            finally:
+                # Also runs when the consumer closes the stream early, which
+                # drops the connection so Ollama stops generating
+                chunks.close()
+                self._release(host)
+
+    # -----------------------------
+    # Health checks
+    # -----------------------------
+    def check_health(self) -> None:
+        """
+        Ping every host and refresh the models it has loaded.
+        """
+        for host in self.hosts:
+            try:
+                models = host.health_client.ps().models
+                host.loaded_models = {m.model or m.name for m in models if m.model or m.name}
+                if not host.healthy:
+                    print(f"Ollama host {host.url} is healthy again")
+                host.healthy = True
+            except Exception as e:
+                if host.healthy:
+                    print(f"Ollama host {host.url} failed health check: {e}")
+                host.healthy = False
+            host.last_checked = time.time()
+
+    def _health_loop(self) -> None:
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(self.health_interval)
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def status(self) -> List[dict]:
+        return [host.status() for host in self.hosts]
@@ -1,19 +1,53 @@
+import asyncio
+import json
 import time
 from contextlib import asynccontextmanager
-from typing import Optional
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, Callable, List, Optional
+import anyio
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.applications import FastAPI
-from pydantic import ValidationError
+from pydantic import Field, ValidationError
 from pydantic.main import BaseModel
 from starlette.exceptions import HTTPException
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
-from app.database import init_db
-from app.graph.agent_graph import run_reasone_dagent_graph
+from app import history, metrics, revisions, shared_state, trace_recorder
+from app.database import init_db, init_revisions_db
+from app.graph.agent_graph import run_reasone_dagent_graph, verification_batcher
+from app.graph.run_context import RunContext
+from app.graph.single_flight import FlightTimeout, SingleFlight, normalize_query
 from app.models.prompt_model import Prompt
-from app.config import APP_MODE, VERIFIER_MODEL
+from app.models.generation_profile_model import GenerationProfile
+from app.schemas.history_schema import HistoryEntry, HistoryPage
+from app.config import (
+    APP_MODE,
+    DISCONNECT_POLL_SECONDS,
+    MAX_REVISIONS,
+    RATE_LIMIT_API_KEY_HEADER,
+    RATE_LIMIT_API_KEYS,
+    RATE_LIMIT_BURST_TOKENS,
+    RATE_LIMIT_PATHS,
+    RATE_LIMIT_TOKENS_PER_MINUTE,
+    REVISION_LONG_POLL_SECONDS,
+    REVISION_TTL_SECONDS,
+    VERIFIER_MODEL,
+)
+from app.llm.clients import pool_status
 from app.llm.local_llm import LocalLLM, Query
+from app.http_cache import CachedBody, cached_response, make_etag
+from app.rate_limit import (
+    RateLimitMiddleware,
+    TokenRateLimiter,
+    record_token_usage,
+    request_client_key,
+)
+from app.generation_profiles import PROFILES_STATE_KEY, get_generation_options, profile_overrides
+from app.prompts_loader import PROMPTS_STATE_KEY, get_active_prompt_set
+from app.shared_state import VersionedCache
 from app.schemas.prompt_schema import (
     PromptCreate, 
     PromptType, 
@@ -22,19 +56,44 @@ from app.schemas.prompt_schema import (
     PromptList, 
     PromptActivateResponse
 )
+from app.schemas.generation_profile_schema import (
+    GenerationStage,
+    GenerationProfileUpdate,
+    GenerationProfileResponse,
+)
 
 class UnicornException(Exception):
     def __init__(self, details: str, status_code: int = 500):
         self.details = details
         self.status_code = status_code
 
+class ClientDisconnected(Exception):
+    pass
+
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database
+    # Startup: Initialize database, recording how long each step takes
+    startup_timings = {}
+    step_start = time.perf_counter()
     init_db()
+    init_revisions_db()
+    startup_timings["init_db"] = time.perf_counter() - step_start
+    step_start = time.perf_counter()
+    shared_state.start()
+    startup_timings["shared_state"] = time.perf_counter() - step_start
+    step_start = time.perf_counter()
+    history.start()
+    startup_timings["history"] = time.perf_counter() - step_start
+    trace_recorder.start()
+    app.state.startup_timings = startup_timings
     yield
-    # Shutdown: No cleanup needed for SQLite
+    # Shutdown: Write out queued history, traces and revisions, stop syncing
+    # shared state and flush this worker's counters
+    history.stop()
+    trace_recorder.stop()
+    answer_revisions.flush()
+    shared_state.stop()
 
 
 app = FastAPI(
@@ -51,6 +110,22 @@ origins = [
     "http://localhost:8000/"
 ]
 
+# Charge each client for the Ollama tokens its generations consume.
+# Added before CORS so that 429 responses still carry CORS headers
+rate_limiter = None
+if RATE_LIMIT_TOKENS_PER_MINUTE > 0:
+    rate_limiter = TokenRateLimiter(
+        capacity=RATE_LIMIT_BURST_TOKENS,
+        refill_per_second=RATE_LIMIT_TOKENS_PER_MINUTE / 60,
+    )
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        paths=RATE_LIMIT_PATHS,
+        api_key_header=RATE_LIMIT_API_KEY_HEADER,
+        api_keys=RATE_LIMIT_API_KEYS,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins='origins',
@@ -64,12 +139,41 @@ app.add_middleware(
 # -----------------------------
 class AskRequest(BaseModel):
     query: str
+    deadline_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Return the best partial answer if verification has not finished by then",
+    )
+    include_trace: bool = Field(default=False, description="Include the per-node execution trace")
+    optimistic: bool = Field(
+        default=False,
+        description="Return the first answer right away and verify it in the background "
+                    "(follow it through /revisions/{revision_id})",
+    )
 
 
 class AskResponse(BaseModel):
     answer: str
     mode: str
     latency_seconds: float
+    verified: bool = Field(default=False, description="The verifier approved this answer")
+    partial: bool = Field(default=False, description="Deadline expired before the graph finished")
+    trace: Optional[List[dict]] = Field(default=None, description="Per-node execution trace")
+    revision_id: Optional[str] = Field(default=None, description="Set in optimistic mode")
+
+
+class RevisionResponse(BaseModel):
+    revision_id: str
+    version: int = Field(..., description="Pass as `after_version` to wait for the next change")
+    status: str = Field(
+        ..., description="pending, verifying, verified, corrected, unverified or failed"
+    )
+    answer: Optional[str] = None
+    initial_answer: Optional[str] = None
+    verdict_ok: Optional[bool] = None
+    issues: Optional[str] = None
+    error: Optional[str] = None
+    finished: bool
 
 # -----------------------------
 # Health Check
@@ -81,6 +185,312 @@ def health_check():
         "mode": APP_MODE,
     }
 
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "worker_id": shared_state.WORKER_ID,
+        "counters": metrics.snapshot(),
+        "graph_in_flight": graph_flights.in_flight(),
+        "all_workers": shared_state.aggregate_metrics(),
+        "ollama_hosts": pool_status(),
+        "rate_limited_clients": rate_limiter.clients() if rate_limiter else 0,
+        "verify_batching": verification_batcher.stats(),
+        "revisions": len(answer_revisions),
+    }
+
+# -----------------------------
+# Graph Execution
+# -----------------------------
+# Identical queries submitted while one is already running share its result
+graph_flights = SingleFlight("single_flight")
+
+async def execute_graph(query: str, context: RunContext, prompt_set=()) -> RunContext:
+    # Abandon the worker thread on cancellation instead of waiting for it;
+    # cancelling the context makes it stop at the next streamed chunk.
+    started_at, start = time.time(), time.perf_counter()
+    status = "failed"
+    try:
+        await anyio.to_thread.run_sync(
+            partial(run_reasone_dagent_graph, query, context), abandon_on_cancel=True
+        )
+        status = "ok"
+    except asyncio.CancelledError:
+        context.cancel()
+        status = "cancelled"
+        raise
+    finally:
+        if trace_recorder.enabled():
+            trace_recorder.record(trace_recorder.build_record(
+                query, context, prompt_set, started_at, time.perf_counter() - start, status
+            ))
+    return context
+
+async def run_graph_coalesced(
+    query: str,
+    deadline_seconds: Optional[float] = None,
+    on_join: Optional[Callable[[RunContext], None]] = None,
+) -> RunContext:
+    """
+    Run the agent graph, joining an identical in-flight execution if there is one.
+    Queries are identical when their normalized text and active prompt set match.
+
+    If `deadline_seconds` expires first, the run's progress so far is returned
+    (check `finished`); the execution is cancelled unless others still wait on it.
+    `on_join` is called with the run's context as soon as it is known.
+    """
+    prompt_set = await run_in_threadpool(get_active_prompt_set)
+    key = (normalize_query(query), prompt_set)
+    try:
+        context, _ = await graph_flights.do(
+            key,
+            lambda context: execute_graph(query, context, prompt_set),
+            context_factory=RunContext,
+            timeout=deadline_seconds,
+            on_join=on_join,
+        )
+    except FlightTimeout as exc:
+        metrics.incr("graph.deadline_expired")
+        return exc.context
+    return context
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable):
+    """
+    Await `awaitable`, cancelling it if the client disconnects first.
+
+    Raises:
+        ClientDisconnected: If the client went away before the result was ready
+    """
+    work = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return work.result()
+            if await request.is_disconnected():
+                metrics.incr("graph.client_disconnected")
+                raise ClientDisconnected()
+    finally:
+        if not work.done():
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+
+def charge_usage(client: str, run: RunContext) -> None:
+    """
+    Charge a client's bucket directly for the tokens `run` has not billed yet.
+    """
+    tokens = run.take_usage()
+    if tokens and rate_limiter is not None:
+        rate_limiter.charge(client, tokens)
+        metrics.incr("rate_limit.tokens_charged", tokens)
+
+def bill_usage(raw_request: Request, run: RunContext, charge_now: bool = False) -> None:
+    """
+    Bill the tokens `run` has used so far to the requesting client, and
+    whatever it still uses (e.g., a cancelled stream reporting its usage on
+    close) once the execution completes.
+
+    Args:
+        charge_now: Charge the bucket directly instead of through
+            RateLimitMiddleware, for use after the response was sent
+    """
+    if rate_limiter is None:
+        return
+    client = request_client_key(raw_request, RATE_LIMIT_API_KEY_HEADER, RATE_LIMIT_API_KEYS)
+    if charge_now:
+        charge_usage(client, run)
+    else:
+        record_token_usage(raw_request, run.take_usage())
+    run.add_done_callback(partial(charge_usage, client))
+
+
+def record_history(
+    raw_request: Request, query: str, response: AskResponse, run: RunContext
+) -> None:
+    """
+    Queue an answered query for the requesting user's history.
+    """
+    user_id, session_id = history.request_identity(raw_request)
+    if user_id is None:
+        # Only clients with an allowed API key have a history
+        return
+    verdict = run.verdict if isinstance(run.verdict, dict) else {}
+    history.record({
+        "user_id": user_id,
+        "session_id": session_id,
+        "query": query,
+        "answer": response.answer,
+        "verdict_ok": verdict.get("ok"),
+        "verdict_issues": verdict.get("issues") or None,
+        "verified": response.verified,
+        "partial": response.partial,
+        "latency_seconds": response.latency_seconds,
+        "mode": response.mode.value if hasattr(response.mode, "value") else str(response.mode),
+        "created_at": datetime.utcnow(),
+    })
+
+# -----------------------------
+# Optimistic Delivery
+# -----------------------------
+answer_revisions = revisions.RevisionStore(REVISION_TTL_SECONDS, MAX_REVISIONS)
+# Keeps background verifications referenced until they finish
+background_runs: set = set()
+
+def refresh_revision(revision: revisions.Revision, run: RunContext) -> None:
+    """
+    Copy a run's progress into its revision (event loop only).
+    """
+    if revision.finished or run.answer is None:
+        return
+    revision.update(answer=run.answer, verdict=run.verdict, status=revisions.VERIFYING)
+
+def finish_revision(
+    revision: revisions.Revision, run: Optional[RunContext], error: Optional[str] = None
+) -> None:
+    if run is not None:
+        refresh_revision(revision, run)
+    if error is not None:
+        status = revisions.FAILED
+    elif run is None or not run.finished:
+        # Deadline expired or cancelled before verification finished
+        status = revisions.UNVERIFIED
+    elif revision.answer != revision.initial_answer:
+        status = revisions.CORRECTED
+    elif run.verified:
+        status = revisions.VERIFIED
+    else:
+        status = revisions.UNVERIFIED
+    revision.update(status=status, error=error, finished=True)
+    metrics.incr(f"revisions.{status}")
+
+async def verify_in_background(
+    request: AskRequest, raw_request: Request, revision: revisions.Revision, start_time: float
+) -> None:
+    """
+    Run the whole graph for an optimistic request, publishing every new
+    answer or verdict to its revision.
+
+    Tokens used after the first answer was returned are charged to the
+    client directly, and the final answer goes to its history.
+    """
+    loop = asyncio.get_running_loop()
+
+    def on_join(run: RunContext) -> None:
+        revision.run = run
+        run.add_listener(lambda run: loop.call_soon_threadsafe(refresh_revision, revision, run))
+        refresh_revision(revision, run)
+
+    try:
+        run = await run_graph_coalesced(request.query, request.deadline_seconds, on_join=on_join)
+    except asyncio.CancelledError:
+        finish_revision(revision, revision.run)
+        raise
+    except Exception as e:
+        finish_revision(revision, revision.run, error=f"Agent execution failed: {str(e)}")
+        return
+    finally:
+        if revision.run is not None:
+            bill_usage(raw_request, revision.run, charge_now=True)
+
+    finish_revision(revision, run)
+    if revision.answer is not None:
+        record_history(raw_request, request.query, AskResponse(
+            answer=revision.answer,
+            mode=APP_MODE,
+            latency_seconds=round(time.time() - start_time, 2),
+            verified=run.verified,
+            partial=not run.finished,
+            revision_id=revision.id,
+        ), run)
+
+async def prompt_optimistic(
+    request: AskRequest, raw_request: Request, start_time: float
+) -> AskResponse:
+    """
+    Return the first answer as soon as the reasoner has produced it; the rest
+    of the graph keeps running in the background.
+    """
+    revision = answer_revisions.create()
+    task = asyncio.create_task(verify_in_background(request, raw_request, revision, start_time))
+    background_runs.add(task)
+    task.add_done_callback(background_runs.discard)
+
+    try:
+        await cancel_on_disconnect(raw_request, revision.wait_for_change(after_version=0))
+    except ClientDisconnected:
+        # Nobody will read the answer
+        task.cancel()
+        raise UnicornException(status_code=499, details="Client closed request")
+    finally:
+        # The background task charges whatever the run uses from here on
+        if revision.run is not None:
+            record_token_usage(raw_request, revision.run.take_usage())
+
+    run = revision.run
+    if revision.answer is None:
+        if revision.status == revisions.UNVERIFIED:
+            raise UnicornException(
+                status_code=504, details="Deadline expired before an answer was generated"
+            )
+        raise UnicornException(
+            details=revision.error or "Agent execution failed: Agent returned no result"
+        )
+
+    metrics.incr("revisions.created")
+    return AskResponse(
+        answer=revision.initial_answer,
+        mode=APP_MODE,
+        latency_seconds=round(time.time() - start_time, 2),
+        verified=revision.status == revisions.VERIFIED,
+        partial=not revision.finished,
+        trace=[entry.as_dict() for entry in run.trace] if request.include_trace and run else None,
+        revision_id=revision.id,
+    )
+
+@app.get("/revisions/{revision_id}", response_model=RevisionResponse)
+async def get_revision(
+    revision_id: str,
+    after_version: Optional[int] = None,
+    timeout: Optional[float] = None,
+):
+    """
+    Current state of an optimistic answer.
+
+    With `after_version`, waits (long-poll) up to `timeout` seconds (at most
+    REVISION_LONG_POLL_SECONDS) for a newer version or for the revision to finish.
+    """
+    if after_version is None:
+        state = await answer_revisions.wait(revision_id)
+    else:
+        wait = REVISION_LONG_POLL_SECONDS
+        if timeout is not None:
+            wait = min(timeout, REVISION_LONG_POLL_SECONDS)
+        state = await answer_revisions.wait(revision_id, after_version, max(0.0, wait))
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Revision {revision_id} not found")
+    return RevisionResponse(**state)
+
+@app.websocket("/ws/revisions/{revision_id}")
+async def revision_updates(websocket: WebSocket, revision_id: str):
+    """
+    Push every new version of an optimistic answer until it is finished.
+    """
+    await websocket.accept()
+    version = -1
+    try:
+        while True:
+            state = await answer_revisions.wait(revision_id, version, REVISION_LONG_POLL_SECONDS)
+            if state is None:
+                await websocket.close(code=4404, reason="Revision not found")
+                return
+            if state["version"] > version:
+                version = state["version"]
+                await websocket.send_json(state)
+            if state["finished"]:
+                break
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
 # -----------------------------
 # Main Ask Endpoint
 # -----------------------------
@@ -92,55 +502,123 @@ async def unicorn_exception_handler(request: Request, exc: UnicornException):
     )
 
 @app.post("/prompt", response_model=AskResponse) 
-def prompt(request: AskRequest):
+async def prompt(request: AskRequest, raw_request: Request):
     start_time = time.time()
 
     if not request.query or not request.query.strip():
         raise UnicornException(details="Query cannot be empty")
 
+    if request.optimistic:
+        return await prompt_optimistic(request, raw_request, start_time)
+
+    # Every outcome is billed, including disconnects, failures and deadlines
+    joined: List[RunContext] = []
     try:
-        result = run_reasone_dagent_graph(request.query)
+        run = await cancel_on_disconnect(
+            raw_request,
+            run_graph_coalesced(request.query, request.deadline_seconds, on_join=joined.append),
+        )
+    except ClientDisconnected:
+        raise UnicornException(status_code=499, details="Client closed request")
     except Exception as e:
         raise UnicornException(status_code=500, details=f"Agent execution failed: {str(e)}")
-        
-    if result is None:
+    finally:
+        if joined:
+            bill_usage(raw_request, joined[0])
+
+    if run.answer is None:
+        if not run.finished:
+            raise UnicornException(
+                status_code=504, details="Deadline expired before an answer was generated"
+            )
         raise UnicornException(details=f"Agent execution failed: Agent returned no result")
 
     latency = round(time.time() - start_time, 2)
 
-    return AskResponse(
-        answer=result,
+    response = AskResponse(
+        answer=run.answer,
         mode=APP_MODE,
         latency_seconds=latency,
+        verified=run.verified,
+        partial=not run.finished,
+        trace=[entry.as_dict() for entry in run.trace] if request.include_trace else None,
     )
+    record_history(raw_request, request.query, response, run)
+    return response
 
 @app.post("/reason")
-def reason(request: AskRequest):
+async def reason(request: AskRequest, raw_request: Request):
     start_time = time.time()
 
     if not request.query or not request.query.strip():
         raise UnicornException(details="Query cannot be empty")
 
+    joined: List[RunContext] = []
     try:
-        reasonedAnswer = run_reasone_dagent_graph(request.query)
+        run = await cancel_on_disconnect(
+            raw_request,
+            run_graph_coalesced(request.query, request.deadline_seconds, on_join=joined.append),
+        )
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Agent execution failed: {str(e)}"
         )
-    
-    if reasonedAnswer is None:
+    finally:
+        if joined:
+            bill_usage(raw_request, joined[0])
+
+    if run.answer is None:
         raise HTTPException(
-            status_code=500,
+            status_code=504 if not run.finished else 500,
             detail="Agent returned no result"
         )
 
     latency = round(time.time() - start_time, 2)
 
-    return AskResponse(
-        answer=reasonedAnswer,
+    response = AskResponse(
+        answer=run.answer,
         mode=APP_MODE,
         latency_seconds=latency,
+        verified=run.verified,
+        partial=not run.finished,
+        trace=[entry.as_dict() for entry in run.trace] if request.include_trace else None,
+    )
+    record_history(raw_request, request.query, response, run)
+    return response
+
+# -----------------------------
+# Query History
+# -----------------------------
+MAX_HISTORY_PAGE_SIZE = 100
+
+@app.get("/history", response_model=HistoryPage)
+def list_history(
+    request: Request,
+    session_id: Optional[str] = None,
+    before: Optional[int] = None,
+    limit: int = 20,
+):
+    """
+    The requesting user's answered queries, newest first.
+    Pass the returned `next_cursor` as `before` to fetch the next page.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    user_id, _ = history.request_identity(request)
+    if user_id is None:
+        raise HTTPException(
+            status_code=401,
+            detail=f"History requires a valid {RATE_LIMIT_API_KEY_HEADER} header",
+        )
+    try:
+        entries, next_cursor = history.get_page(user_id, session_id, before, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving history: {str(e)}")
+    return HistoryPage(
+        items=[HistoryEntry.model_validate(entry) for entry in entries],
+        next_cursor=next_cursor,
     )
 
 @app.post("verify")
@@ -205,8 +683,17 @@ def verify(request: AskRequest):
 # PROMPT MANAGEMENT ENDPOINTS
 # =============================
 
-@app.get("/prompts", response_model=PromptList)
+# Serialized prompt read responses, invalidated by any prompt write (on any worker)
+prompt_responses = VersionedCache(PROMPTS_STATE_KEY, name="prompt_responses")
+
+
+def _latest_update(prompts) -> Optional[str]:
+    return max((prompt.updated_at for prompt in prompts), default=None)
+
+
+@app.get("/prompts", response_model=PromptList, response_class=ORJSONResponse)
 def list_prompts(
+    request: Request,
     prompt_type: Optional[PromptType] = PromptType.all,
     tags: Optional[str] = None, 
     page: int = 1,
@@ -214,56 +701,73 @@ def list_prompts(
 ):
     """
     List all prompts with optional filtering by type and tags.
-    Supports pagination.
+    Supports pagination and conditional GET (ETag / If-None-Match).
     """
-    # Use SessionLocal to get a database session
-    from app.database import SessionLocal
-    
-    db = SessionLocal()
-    try:
-        query = db.query(Prompt)
-        
-        if prompt_type is not None:
-            query = query.filter(Prompt.type == prompt_type)
+    def load() -> CachedBody:
+        # Use SessionLocal to get a database session
+        from app.database import SessionLocal
         
-        if tags:
-            # Simple substring search in tags
-            query = query.filter(Prompt.tags.ilike(f"%{tags}%"))
-        
-        prompts = query.offset((page - 1) * page_size).limit(page_size).all()
-
+        db = SessionLocal()
         try:
-            prompts = [PromptResponse.model_validate(prompt) for prompt in prompts]
-        except ValidationError as exc:
-            prompts = repr(exc.errors()[0]['msg'])
+            query = db.query(Prompt)
             
-        return PromptList(
-            total=query.count(),
-            prompts=prompts,
-            page=page,
-            page_size=page_size,
-        )
-    finally:
-        db.close()
+            if prompt_type is not None and prompt_type != PromptType.all:
+                query = query.filter(Prompt.type == prompt_type.value)
+            
+            if tags:
+                # Simple substring search in tags
+                query = query.filter(Prompt.tags.ilike(f"%{tags}%"))
+            
+            prompts = query.offset((page - 1) * page_size).limit(page_size).all()
+            etag = make_etag(
+                "prompts", shared_state.get_version(PROMPTS_STATE_KEY), _latest_update(prompts),
+                prompt_type, tags, page, page_size,
+            )
+
+            try:
+                prompts = [PromptResponse.model_validate(prompt) for prompt in prompts]
+            except ValidationError as exc:
+                prompts = repr(exc.errors()[0]['msg'])
+                
+            content = PromptList(
+                total=query.count(),
+                prompts=prompts,
+                page=page,
+                page_size=page_size,
+            )
+            return CachedBody(content.model_dump(mode="json"), etag)
+        finally:
+            db.close()
 
+    cached = prompt_responses.get(("list", prompt_type, tags, page, page_size), load)
+    return cached_response(request, cached)
 
-@app.get("/prompts/{prompt_id}", response_model=PromptResponse)
-def get_prompt(prompt_id: int):
+
+@app.get("/prompts/{prompt_id}", response_model=PromptResponse, response_class=ORJSONResponse)
+def get_prompt(prompt_id: int, request: Request):
     """
     Get a single prompt by ID.
+    Supports conditional GET (ETag / If-None-Match).
     """
-    from app.database import SessionLocal
-    db = SessionLocal()
-    try:
-        prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
-        if not prompt:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Prompt with ID {prompt_id} not found"
+    def load() -> CachedBody:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
+            if not prompt:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Prompt with ID {prompt_id} not found"
+                )
+            etag = make_etag(
+                "prompt", prompt_id, shared_state.get_version(PROMPTS_STATE_KEY), prompt.updated_at,
             )
-        return PromptResponse.model_validate(prompt)
-    finally:
-        db.close()
+            return CachedBody(PromptResponse.model_validate(prompt).model_dump(mode="json"), etag)
+        finally:
+            db.close()
+
+    cached = prompt_responses.get(("get", prompt_id), load)
+    return cached_response(request, cached)
 
 
 @app.post("/prompts", response_model=PromptResponse)
@@ -283,6 +787,7 @@ def create_prompt(request: PromptCreate):
                 Prompt.is_active == True
             ).update({"is_active": False})
         
+        shared_state.bump_version(db, PROMPTS_STATE_KEY)
         prompt = Prompt(
             title=request.title,
             content=request.content,
@@ -337,6 +842,7 @@ def update_prompt(prompt_id: int, request: PromptUpdate):
         # if "content" in update_data:
         #     prompt.version = (prompt.version or 1) + 1
         
+        shared_state.bump_version(db, PROMPTS_STATE_KEY)
         db.commit()
         db.refresh(prompt)
         return PromptResponse.model_validate(prompt)
@@ -369,6 +875,7 @@ def delete_prompt(prompt_id: int):
             )
         
         db.delete(prompt)
+        shared_state.bump_version(db, PROMPTS_STATE_KEY)
         db.commit()
         return {"message": f"Prompt {prompt_id} deleted successfully"}
     except HTTPException:
@@ -408,6 +915,7 @@ def activate_prompt(prompt_id: int):
         
         # Activate this prompt
         db.query(Prompt).filter(Prompt.id == prompt_id).update({"is_active": True})
+        shared_state.bump_version(db, PROMPTS_STATE_KEY)
         db.commit()
         db.refresh(prompt)
         return PromptActivateResponse(
@@ -428,3 +936,102 @@ def activate_prompt(prompt_id: int):
         )
     finally:
         db.close()
+
+
+# =============================
+# GENERATION PROFILE ENDPOINTS
+# =============================
+
+def _profile_response(
+    stage: GenerationStage, profile: Optional[GenerationProfile]
+) -> GenerationProfileResponse:
+    return GenerationProfileResponse(
+        stage=stage,
+        options=get_generation_options(stage.value),
+        overrides=profile_overrides(profile),
+        updated_at=profile.updated_at if profile else None,
+    )
+
+
+@app.get("/profiles", response_model=list[GenerationProfileResponse])
+def list_profiles():
+    """
+    List the effective generation options for every pipeline stage.
+    """
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        profiles = {profile.stage: profile for profile in db.query(GenerationProfile).all()}
+        return [_profile_response(stage, profiles.get(stage.value)) for stage in GenerationStage]
+    finally:
+        db.close()
+
+
+@app.get("/profiles/{stage}", response_model=GenerationProfileResponse)
+def get_profile(stage: GenerationStage):
+    """
+    Get the effective generation options for a single stage.
+    """
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        profile = db.query(GenerationProfile).filter(GenerationProfile.stage == stage.value).first()
+        return _profile_response(stage, profile)
+    finally:
+        db.close()
+
+
+@app.put("/profiles/{stage}", response_model=GenerationProfileResponse)
+def update_profile(stage: GenerationStage, request: GenerationProfileUpdate):
+    """
+    Set the generation options for a stage.
+    Takes effect on the next request; unset fields fall back to the defaults.
+    """
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        profile = db.query(GenerationProfile).filter(GenerationProfile.stage == stage.value).first()
+        if not profile:
+            profile = GenerationProfile(stage=stage.value)
+            db.add(profile)
+
+        update_data = request.model_dump()
+        if update_data["stop"] is not None:
+            update_data["stop"] = json.dumps(update_data["stop"])
+        for field, value in update_data.items():
+            setattr(profile, field, value)
+
+        shared_state.bump_version(db, PROFILES_STATE_KEY)
+        db.commit()
+        db.refresh(profile)
+        return _profile_response(stage, profile)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to update generation profile: {str(e)}"
+        )
+    finally:
+        db.close()
+
+
+@app.delete("/profiles/{stage}")
+def reset_profile(stage: GenerationStage):
+    """
+    Remove a stage's stored options, reverting it to the defaults.
+    """
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        db.query(GenerationProfile).filter(GenerationProfile.stage == stage.value).delete()
+        shared_state.bump_version(db, PROFILES_STATE_KEY)
+        db.commit()
+        return {"message": f"Generation profile '{stage.value}' reset to defaults"}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to reset generation profile: {str(e)}"
+        )
+    finally:
+        db.close()
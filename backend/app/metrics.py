@@ -0,0 +1,30 @@
+"""
+In-process counters for operational metrics.
+Exposed through the /metrics endpoint.
+"""
+import threading
+from collections import Counter
+from typing import Dict
+
+_lock = threading.Lock()
+_counters: Counter = Counter()
+
+
+def incr(name: str, amount: float = 1) -> None:
+    """
+    Increment a named counter.
+
+    Args:
+        name: Dotted counter name (e.g., 'single_flight.coalesced')
+        amount: Value to add to the counter
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot() -> Dict[str, float]:
+    """
+    Return a point-in-time copy of all counters.
+    """
+    with _lock:
+        return dict(_counters)
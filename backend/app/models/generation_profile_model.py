@@ -0,0 +1,40 @@
+"""
+ORM model for per-stage generation profiles.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from app.database import Base
+
+
+class GenerationProfile(Base):
+    """
+    SQLAlchemy ORM model for the Ollama generation options of a pipeline stage.
+    Unset (NULL) columns fall back to the defaults in app.config.GENERATION_PROFILES.
+    
+    Attributes:
+        id: Primary key (auto-incremented)
+        stage: Pipeline stage the profile applies to ('reasoner', 'verifier', 'correction')
+        num_predict: Maximum number of tokens to generate
+        num_ctx: Context window size in tokens
+        temperature: Sampling temperature
+        top_p: Nucleus sampling probability mass
+        top_k: Number of highest-probability tokens considered
+        stop: JSON-encoded list of stop sequences
+        created_at: Timestamp of creation
+        updated_at: Timestamp of last modification
+    """
+    __tablename__ = "generation_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stage = Column(String(50), nullable=False, unique=True, index=True)
+    num_predict = Column(Integer, nullable=True)
+    num_ctx = Column(Integer, nullable=True)
+    temperature = Column(Float, nullable=True)
+    top_p = Column(Float, nullable=True)
+    top_k = Column(Integer, nullable=True)
+    stop = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<GenerationProfile(id={self.id}, stage='{self.stage}')>"
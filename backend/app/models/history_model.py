@@ -0,0 +1,56 @@
+"""
+ORM model for the server-side query history.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, Index
+from app.database import HistoryBase
+
+
+class QueryHistory(HistoryBase):
+    """
+    One answered query.
+    
+    Attributes:
+        id: Primary key; increases with insertion order, so it doubles as the
+            keyset pagination cursor
+        user_id: Who asked (hashed API key; clients without an allowed key have
+            no history)
+        session_id: Optional client-provided session (X-Session-Id header)
+        query: The user query
+        answer: The returned answer
+        verdict_ok: Whether the verifier approved the first answer (None if
+            verification did not finish)
+        verdict_issues: Issues reported by the verifier, if any
+        verified: The verifier approved the returned answer
+        partial: The answer was returned before the graph finished
+        latency_seconds: Request latency
+        mode: App mode that served the request
+        created_at: Timestamp of the request
+    """
+    __tablename__ = "query_history"
+    __table_args__ = (
+        # Keyset pagination per user and per session, newest first
+        Index("ix_query_history_user_id_id", "user_id", "id"),
+        Index("ix_query_history_session_id_id", "session_id", "id"),
+        # Retention pruning by age
+        Index("ix_query_history_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String(200), nullable=False)
+    session_id = Column(String(100), nullable=True)
+    query = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    verdict_ok = Column(Boolean, nullable=True)
+    verdict_issues = Column(Text, nullable=True)
+    verified = Column(Boolean, nullable=False, default=False)
+    partial = Column(Boolean, nullable=False, default=False)
+    latency_seconds = Column(Float, nullable=False)
+    mode = Column(String(20), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<QueryHistory(id={self.id}, user_id='{self.user_id}', "
+            f"created_at={self.created_at})>"
+        )
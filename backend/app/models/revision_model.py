@@ -0,0 +1,52 @@
+"""
+ORM model for optimistic answer revisions, shared between worker processes.
+"""
+from sqlalchemy import Boolean, Column, Float, Integer, String, Text
+from app.database import RevisionsBase
+
+
+class AnswerRevision(RevisionsBase):
+    """
+    Latest state of one optimistic answer, written by the worker running it
+    so that every worker can serve GET /revisions/{id} and its WebSocket.
+
+    Attributes:
+        id: Revision ID returned to the client
+        version: Change counter; a write never replaces a newer version
+        status: Revision status (see app.revisions)
+        answer: Latest answer
+        initial_answer: The answer first returned to the client
+        verdict_ok: Whether the verifier approved the initial answer
+        issues: Issues reported by the verifier, if any
+        error: Why the graph failed, if it did
+        finished: No further changes will happen
+        updated_at: Unix timestamp of the last change
+    """
+    __tablename__ = "answer_revisions"
+
+    id = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    status = Column(String(20), nullable=False)
+    answer = Column(Text, nullable=True)
+    initial_answer = Column(Text, nullable=True)
+    verdict_ok = Column(Boolean, nullable=True)
+    issues = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    finished = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(Float, nullable=False, index=True)
+
+    def as_dict(self) -> dict:
+        return {
+            "revision_id": self.id,
+            "version": self.version,
+            "status": self.status,
+            "answer": self.answer,
+            "initial_answer": self.initial_answer,
+            "verdict_ok": self.verdict_ok,
+            "issues": self.issues,
+            "error": self.error,
+            "finished": self.finished,
+        }
+
+    def __repr__(self):
+        return f"<AnswerRevision(id='{self.id}', version={self.version}, status='{self.status}')>"
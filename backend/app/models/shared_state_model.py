@@ -0,0 +1,49 @@
+"""
+ORM models for state shared between uvicorn worker processes.
+"""
+from sqlalchemy import Column, Integer, String, Float
+from app.database import Base
+
+
+class StateVersion(Base):
+    """
+    Change counter per logical table or cache.
+    Writers bump the version in the same transaction as their change; every
+    worker watches these rows to invalidate its own caches.
+    
+    Attributes:
+        key: Name of the versioned state (e.g., 'prompts', 'generation_profiles')
+        version: Monotonically increasing change counter
+    """
+    __tablename__ = "state_versions"
+
+    key = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StateVersion(key='{self.key}', version={self.version})>"
+
+
+class WorkerMetric(Base):
+    """
+    Latest value of one counter for one worker process.
+    Summing over workers gives the host-wide value.
+    
+    Attributes:
+        worker_id: Unique identity of the worker process (host:pid:start time)
+        name: Counter name
+        value: Counter value as last flushed by the worker
+        updated_at: Unix timestamp of the last flush
+    """
+    __tablename__ = "worker_metrics"
+
+    worker_id = Column(String(200), primary_key=True)
+    name = Column(String(200), primary_key=True)
+    value = Column(Float, nullable=False, default=0)
+    updated_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<WorkerMetric(worker_id='{self.worker_id}', name='{self.name}', "
+            f"value={self.value})>"
+        )
@@ -1,9 +1,41 @@
 """
 Utility functions for loading and managing prompts from the database.
+
+Active prompts are cached per worker and reloaded whenever the 'prompts'
+shared state version changes (see app.shared_state), so activations made
+through any worker are picked up by all of them.
 """
-from typing import Optional
+from typing import Optional, Tuple
 from app.database import SessionLocal
 from app.models.prompt_model import Prompt
+from app.shared_state import VersionedCache
+
+PROMPTS_STATE_KEY = "prompts"
+
+_active_prompts = VersionedCache(PROMPTS_STATE_KEY)
+
+
+def _load_active_prompt(prompt_type: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        prompt = db.query(Prompt).filter(
+            Prompt.type == prompt_type,
+            Prompt.is_active == True
+        ).first()
+        return str(prompt.content) if prompt else None
+    finally:
+        db.close()
+
+
+def _load_active_prompt_set() -> Tuple[Tuple[int, str], ...]:
+    db = SessionLocal()
+    try:
+        rows = db.query(Prompt.id, Prompt.updated_at).filter(
+            Prompt.is_active == True
+        ).order_by(Prompt.id).all()
+        return tuple((row.id, row.updated_at.isoformat()) for row in rows)
+    finally:
+        db.close()
 
 
 def get_active_prompt(prompt_type: str) -> Optional[str]:
@@ -17,18 +49,29 @@ def get_active_prompt(prompt_type: str) -> Optional[str]:
     Returns:
         The prompt content string if found and active, None otherwise
     """
-    db = SessionLocal()
     try:
-        prompt = db.query(Prompt).filter(
-            Prompt.type == prompt_type,
-            Prompt.is_active == True
-        ).first()
-        return str(prompt.content) if prompt else None
+        return _active_prompts.get(
+            ("content", prompt_type), lambda: _load_active_prompt(prompt_type)
+        )
     except Exception as e:
         print(f"Error retrieving prompt {prompt_type}: {e}")
         return None
-    finally:
-        db.close()
+
+
+def get_active_prompt_set() -> Tuple[Tuple[int, str], ...]:
+    """
+    Identify the set of currently active prompts.
+    Two calls return equal tuples only if the same prompt revisions are active,
+    which makes the result usable as part of a cache or coalescing key.
+    
+    Returns:
+        A sorted tuple of (id, updated_at) pairs for every active prompt
+    """
+    try:
+        return _active_prompts.get(("set",), _load_active_prompt_set)
+    except Exception as e:
+        print(f"Error retrieving active prompt set: {e}")
+        return ()
 
 
 def get_prompt_by_id(prompt_id: int) -> Optional[str]:
@@ -0,0 +1,210 @@
+"""
+Per-client rate limiting weighted by token usage.
+
+Each client (allowed API key, or IP address without one) has a token bucket that
+refills at a fixed rate. Requests are charged after they complete with the
+prompt and completion tokens Ollama actually reported for them, so a client
+sending long generations runs out of quota sooner than one sending short
+ones. Since the cost is only known afterwards, a bucket may go negative; the
+client is rejected with a 429 until it has refilled above zero.
+
+Buckets live in the worker process, so each uvicorn worker enforces the
+limit on its own.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import AbstractSet, Iterable, Optional, Tuple
+
+from fastapi import Request
+
+from app import metrics
+
+USAGE_STATE_KEY = "token_usage"
+
+
+class TokenBucket:
+    """
+    A bucket of `capacity` tokens refilled at `refill_per_second`.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> float:
+        refilled = self.tokens + (now - self.updated) * self.refill_per_second
+        self.tokens = min(self.capacity, refilled)
+        self.updated = now
+        return self.tokens
+
+
+class TokenRateLimiter:
+    """
+    Token buckets keyed by client.
+
+    Args:
+        capacity: Most tokens a client can spend in a burst
+        refill_per_second: Tokens a client regains per second
+        max_clients: Buckets kept in memory; the least recently seen client's
+            bucket is dropped first (it restarts full)
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, max_clients: int = 10_000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.capacity, self.refill_per_second)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def check(self, client: str) -> Tuple[bool, float, float]:
+        """
+        Whether `client` may start a request.
+
+        Returns:
+            A tuple of (allowed, remaining tokens, seconds until allowed)
+        """
+        with self._lock:
+            tokens = self._bucket(client).refill(time.monotonic())
+        if tokens > 0:
+            return True, tokens, 0.0
+        return False, tokens, (1 - tokens) / self.refill_per_second
+
+    def charge(self, client: str, tokens: int) -> float:
+        """
+        Take `tokens` from the client's bucket and return what remains.
+        """
+        with self._lock:
+            bucket = self._bucket(client)
+            bucket.refill(time.monotonic())
+            bucket.tokens -= tokens
+            return bucket.tokens
+
+    def clients(self) -> int:
+        return len(self._buckets)
+
+
+def record_token_usage(request: Request, tokens: int) -> None:
+    """
+    Report the tokens a request consumed, to be charged by RateLimitMiddleware.
+    """
+    request.state.token_usage = getattr(request.state, USAGE_STATE_KEY, 0) + tokens
+
+
+def api_key_digest(api_key: bytes) -> str:
+    """
+    SHA-256 hex digest of an API key, as listed in RATE_LIMIT_API_KEYS.
+    """
+    return hashlib.sha256(api_key).hexdigest()
+
+
+def validated_api_key(scope, api_key_header: bytes, api_keys: AbstractSet[str]) -> Optional[str]:
+    """
+    The digest of the API key the client sent, if it is in `api_keys`.
+    """
+    for name, value in scope.get("headers", ()):
+        if name == api_key_header and value:
+            digest = api_key_digest(value)
+            return digest if digest in api_keys else None
+    return None
+
+
+def client_key(scope, api_key_header: bytes, api_keys: AbstractSet[str] = frozenset()) -> str:
+    """
+    Identify the client: its API key if it sent an allowed one, otherwise its
+    IP address. The key is identified by a prefix of its digest.
+    """
+    digest = validated_api_key(scope, api_key_header, api_keys)
+    if digest is not None:
+        return "key:" + digest[:32]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def request_client_key(
+    request: Request,
+    api_key_header: str = "x-api-key",
+    api_keys: AbstractSet[str] = frozenset(),
+) -> str:
+    """
+    Same as client_key, for a request object.
+    """
+    return client_key(request.scope, api_key_header.lower().encode("latin-1"), api_keys)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing a TokenRateLimiter on selected paths.
+
+    Responses on those paths carry X-RateLimit-Limit and X-RateLimit-Remaining
+    headers; rejected requests get a 429 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: TokenRateLimiter,
+        paths: Iterable[str],
+        api_key_header: str = "x-api-key",
+        api_keys: AbstractSet[str] = frozenset(),
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.paths = frozenset(paths)
+        self.api_key_header = api_key_header.lower().encode("latin-1")
+        self.api_keys = api_keys
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = client_key(scope, self.api_key_header, self.api_keys)
+        allowed, remaining, retry_after = self.limiter.check(client)
+        if not allowed:
+            metrics.incr("rate_limit.rejected")
+            await self._reject(send, remaining, retry_after)
+            return
+
+        state = scope.setdefault("state", {})
+
+        async def send_with_quota(message):
+            if message["type"] == "http.response.start":
+                tokens = state.get(USAGE_STATE_KEY, 0)
+                left = self.limiter.charge(client, tokens) if tokens else remaining
+                metrics.incr("rate_limit.tokens_charged", tokens)
+                message["headers"] = list(message.get("headers", [])) + self._headers(left)
+            await send(message)
+
+        await self.app(scope, receive, send_with_quota)
+
+    def _headers(self, remaining: float):
+        return [
+            (b"x-ratelimit-limit", str(int(self.limiter.capacity)).encode()),
+            (b"x-ratelimit-remaining", str(max(0, int(remaining))).encode()),
+        ]
+
+    async def _reject(self, send, remaining: float, retry_after: float) -> None:
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+        headers = self._headers(remaining) + [
+            (b"retry-after", str(math.ceil(retry_after)).encode()),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,214 @@
+"""
+Replay recorded traffic against the current agent pipeline.
+
+Reads a trace file written with TRACE_RECORD_PATH (see app.trace_recorder),
+re-runs each recorded query through the agent graph with the current models,
+prompts and code, and compares per-stage latencies and token counts with the
+recording. Queries are submitted at their original pacing, scaled by
+`--speed`. Point OLLAMA_HOSTS at real hosts or at app.llm.fake_ollama.
+
+Usage:
+    python -m app.replay traces.ndjson.gz [--speed 10] [--limit 100]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+TOTAL = "total"
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def stage_latencies(entry: dict) -> Dict[str, float]:
+    """
+    Latency per stage of one record: graph nodes, generations (as
+    'gen:<stage>', summed when a stage ran more than once) and the total.
+    """
+    latencies = {
+        node: stage["duration"]
+        for node, stage in entry.get("stages", {}).items()
+        if stage.get("status") == "ok" and stage.get("duration") is not None
+    }
+    for generation in entry.get("generations", []):
+        if generation.get("seconds") is not None:
+            key = f"gen:{generation.get('stage')}"
+            latencies[key] = latencies.get(key, 0.0) + generation["seconds"]
+    latencies[TOTAL] = entry["duration"]
+    return latencies
+
+
+def replay_one(query: str) -> dict:
+    """
+    Run one query through the current agent graph and record it like the server does.
+    """
+    from app.graph.agent_graph import run_agent_graph
+    from app.graph.run_context import RunContext
+    from app.prompts_loader import get_active_prompt_set
+    from app.trace_recorder import build_record
+
+    context = RunContext()
+    prompt_set = get_active_prompt_set()
+    started_at, start = time.time(), time.perf_counter()
+    status = "ok"
+    try:
+        run_agent_graph(query, context)
+    except Exception as e:
+        status = "failed"
+        print(f"Error replaying {query[:40]!r}: {e}", file=sys.stderr)
+    return build_record(query, context, prompt_set, started_at, time.perf_counter() - start, status)
+
+
+def replay(records: List[dict], speed: float, concurrency: int) -> List[Optional[dict]]:
+    """
+    Replay `records` at their recorded pacing divided by `speed` (0 submits
+    them all at once), running at most `concurrency` queries at a time.
+    """
+    results: List[Optional[dict]] = [None] * len(records)
+    origin = records[0]["ts"] if records else 0.0
+    start = time.monotonic()
+
+    def run(index: int) -> None:
+        results[index] = replay_one(records[index]["query"])
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for index, entry in enumerate(records):
+            if speed > 0:
+                delay = (entry["ts"] - origin) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, index)
+    return results
+
+
+def compare(recorded: Iterable[dict], replayed: Iterable[Optional[dict]]) -> Dict[str, dict]:
+    """
+    Per-stage latency statistics of the recording and the replay.
+    Only pairs where both runs completed are compared; the report is empty
+    when there are none.
+    """
+    samples: Dict[str, Dict[str, List[float]]] = defaultdict(
+        lambda: {"recorded": [], "replayed": []}
+    )
+    tokens = {"recorded": 0, "replayed": 0}
+    models: Dict[str, Dict[str, set]] = defaultdict(lambda: {"recorded": set(), "replayed": set()})
+    for before, after in zip(recorded, replayed):
+        if after is None or before.get("status") != "ok" or after["status"] != "ok":
+            continue
+        for side, entry in (("recorded", before), ("replayed", after)):
+            for stage, seconds in stage_latencies(entry).items():
+                samples[stage][side].append(seconds)
+            tokens[side] += entry.get("completion_tokens", 0)
+            for generation in entry.get("generations", []):
+                models[f"gen:{generation.get('stage')}"][side].add(generation.get("model"))
+
+    report: Dict[str, dict] = {}
+    if not samples:
+        return report
+    for stage, sides in samples.items():
+        row = {"n": min(len(sides["recorded"]), len(sides["replayed"]))}
+        for name, fraction in (("p50", 0.5), ("p95", 0.95)):
+            before = percentile(sides["recorded"], fraction)
+            after = percentile(sides["replayed"], fraction)
+            row[name] = {
+                "recorded": before,
+                "replayed": after,
+                "delta": after - before if before is not None and after is not None else None,
+            }
+        row["mean_delta"] = (
+            statistics.fmean(sides["replayed"]) - statistics.fmean(sides["recorded"])
+            if sides["recorded"] and sides["replayed"] else None
+        )
+        if stage in models:
+            row["models"] = {side: sorted(map(str, names)) for side, names in models[stage].items()}
+        report[stage] = row
+    report[TOTAL]["completion_tokens"] = tokens
+    return report
+
+
+def format_report(report: Dict[str, dict]) -> str:
+    def seconds(value: Optional[float], signed: bool = False) -> str:
+        if value is None:
+            return f"{'-':>9}"
+        return f"{value:+9.3f}" if signed else f"{value:9.3f}"
+
+    lines = [
+        f"{'stage':<18} {'n':>4} {'p50 rec':>9} {'p50 now':>9} {'delta':>9}"
+        f" {'p95 rec':>9} {'p95 now':>9} {'delta':>9}"
+    ]
+    # Graph nodes first, then generations, then the total
+    order = sorted(report, key=lambda stage: (stage == TOTAL, stage.startswith("gen:"), stage))
+    for stage in order:
+        row = report[stage]
+        lines.append(
+            f"{stage:<18} {row['n']:>4} "
+            f"{seconds(row['p50']['recorded'])} {seconds(row['p50']['replayed'])} "
+            f"{seconds(row['p50']['delta'], True)} "
+            f"{seconds(row['p95']['recorded'])} {seconds(row['p95']['replayed'])} "
+            f"{seconds(row['p95']['delta'], True)}"
+        )
+    for stage in order:
+        models = report[stage].get("models")
+        if models and models["recorded"] != models["replayed"]:
+            recorded, replayed = ", ".join(models["recorded"]), ", ".join(models["replayed"])
+            lines.append(f"{stage} model: {recorded} -> {replayed}")
+    tokens = report[TOTAL]["completion_tokens"]
+    lines.append(f"completion tokens: recorded {tokens['recorded']}, replayed {tokens['replayed']}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="Trace file written with TRACE_RECORD_PATH")
+    parser.add_argument(
+        "--speed", type=float, default=1.0,
+        help="Pacing multiplier (1 = original pacing, 10 = ten times faster, 0 = all at once)",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N records")
+    parser.add_argument("--concurrency", type=int, default=8, help="Queries running at once")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from app.database import init_db
+    from app.prompts_loader import get_active_prompt_set
+    from app.trace_recorder import read_traces
+
+    init_db()
+    records = [entry for entry in read_traces(args.path) if entry.get("status") == "ok"]
+    records = records[:args.limit] if args.limit is not None else records
+    if not records:
+        print("No completed executions to replay", file=sys.stderr)
+        return 1
+
+    current_ids = sorted(prompt_id for prompt_id, _ in get_active_prompt_set())
+    changed = sum(1 for entry in records if sorted(entry.get("prompt_ids", [])) != current_ids)
+    if changed:
+        print(f"Note: {changed} of {len(records)} records were recorded with other active prompts",
+              file=sys.stderr)
+
+    started = time.perf_counter()
+    replayed = replay(records, args.speed, args.concurrency)
+    report = compare(records, replayed)
+    if TOTAL not in report:
+        print("Every replayed execution failed", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+        print(f"Replayed {len(records)} executions in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Revisions of answers delivered optimistically.
+
+In optimistic mode `/prompt` returns the reasoner's first answer right away
+and keeps verifying (and, if needed, correcting) it in the background. The
+revision tracks that answer as it changes; clients follow it through
+`GET /revisions/{id}` (long-poll) or the `/ws/revisions/{id}` WebSocket.
+
+The worker that served the request keeps the live revision in memory and
+only touches it from its event loop. Every change is also written to the
+`answer_revisions` table (off the event loop, in REVISIONS_DATABASE_URL), so
+any worker can serve it: the others re-read the row every
+REVISION_POLL_SECONDS while they wait for a change.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.config import REVISION_POLL_SECONDS
+from app.database import RevisionsSessionLocal
+from app.models.revision_model import AnswerRevision
+
+# Revision statuses
+PENDING = "pending"          # No answer yet
+VERIFYING = "verifying"      # First answer available, verification running
+VERIFIED = "verified"        # The first answer passed verification
+CORRECTED = "corrected"      # The answer was corrected after verification
+UNVERIFIED = "unverified"    # Verification did not finish (deadline or cancellation)
+FAILED = "failed"            # The graph failed
+
+
+class Revision:
+    """
+    The evolving answer to one optimistic request.
+
+    Attributes:
+        id: Revision ID returned to the client
+        version: Incremented on every change; clients pass the last version
+            they saw to wait for the next one
+        status: One of the statuses above
+        answer: Latest answer
+        initial_answer: The answer first returned to the client
+        verdict: The verifier's verdict on the initial answer
+        finished: No further changes will happen
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.version = 0
+        self.status = PENDING
+        self.answer: Optional[str] = None
+        self.initial_answer: Optional[str] = None
+        self.verdict: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.finished = False
+        # RunContext of the execution producing this revision
+        self.run = None
+        self.updated = time.monotonic()
+        self._changed = asyncio.Event()
+        # Called after every change (set by RevisionStore to persist it)
+        self.on_change: Optional[Callable[["Revision"], None]] = None
+
+    def update(self, **fields) -> None:
+        """
+        Apply changed fields and wake everyone waiting for a new version.
+        """
+        changed = {name: value for name, value in fields.items() if getattr(self, name) != value}
+        if not changed:
+            return
+        for name, value in changed.items():
+            setattr(self, name, value)
+        if self.initial_answer is None and self.answer is not None:
+            self.initial_answer = self.answer
+        self.version += 1
+        self.updated = time.monotonic()
+        self._changed.set()
+        self._changed = asyncio.Event()
+        if self.on_change is not None:
+            self.on_change(self)
+
+    async def wait_for_change(self, after_version: int, timeout: Optional[float] = None) -> None:
+        """
+        Return once the version is past `after_version`, the revision is
+        finished or `timeout` seconds have passed.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while self.version <= after_version and not self.finished:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def as_dict(self) -> dict:
+        verdict = self.verdict if isinstance(self.verdict, dict) else {}
+        return {
+            "revision_id": self.id,
+            "version": self.version,
+            "status": self.status,
+            "answer": self.answer,
+            "initial_answer": self.initial_answer,
+            "verdict_ok": verdict.get("ok"),
+            "issues": verdict.get("issues") or None,
+            "error": self.error,
+            "finished": self.finished,
+        }
+
+
+def write_revision(state: dict, updated_at: float) -> None:
+    """
+    Upsert a revision's state (as returned by Revision.as_dict). Writes of
+    an older version than the stored one are ignored.
+    """
+    db = RevisionsSessionLocal()
+    try:
+        db.execute(
+            text(
+                "INSERT INTO answer_revisions (id, version, status, answer, initial_answer, "
+                "verdict_ok, issues, error, finished, updated_at) "
+                "VALUES (:revision_id, :version, :status, :answer, :initial_answer, "
+                ":verdict_ok, :issues, :error, :finished, :updated_at) "
+                "ON CONFLICT (id) DO UPDATE SET version = excluded.version, "
+                "status = excluded.status, answer = excluded.answer, "
+                "initial_answer = excluded.initial_answer, verdict_ok = excluded.verdict_ok, "
+                "issues = excluded.issues, error = excluded.error, "
+                "finished = excluded.finished, updated_at = excluded.updated_at "
+                "WHERE excluded.version > answer_revisions.version"
+            ),
+            {**state, "updated_at": updated_at},
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error writing revision {state['revision_id']}: {e}")
+    finally:
+        db.close()
+
+
+def read_revision(revision_id: str) -> Optional[dict]:
+    """
+    A revision's state as last written by any worker, or None if unknown.
+    """
+    db = RevisionsSessionLocal()
+    try:
+        row = db.get(AnswerRevision, revision_id)
+        return row.as_dict() if row is not None else None
+    finally:
+        db.close()
+
+
+def delete_revisions(before: float) -> None:
+    """
+    Delete stored revisions last changed before the `before` Unix timestamp.
+    """
+    db = RevisionsSessionLocal()
+    try:
+        db.execute(
+            text("DELETE FROM answer_revisions WHERE updated_at < :before"), {"before": before}
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error deleting expired revisions: {e}")
+    finally:
+        db.close()
+
+
+class RevisionStore:
+    """
+    Revisions by ID. Finished revisions are dropped `ttl_seconds` after their
+    last change, or earlier (oldest first) once there are more than `max_entries`
+    in this worker. Stored rows are deleted `ttl_seconds` after their last change.
+
+    Args:
+        persist: Write every change to the `answer_revisions` table
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, persist: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persist = persist
+        self._revisions: "OrderedDict[str, Revision]" = OrderedDict()
+        # One writer thread keeps each revision's writes in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="revision-writer")
+        self._purged = time.monotonic()
+
+    def create(self) -> Revision:
+        self._expire()
+        revision = Revision()
+        if self.persist:
+            revision.on_change = self._write
+            self._write(revision)
+        self._revisions[revision.id] = revision
+        return revision
+
+    def get(self, revision_id: str) -> Optional[Revision]:
+        """
+        A revision running in this worker, or None.
+        """
+        return self._revisions.get(revision_id)
+
+    async def wait(
+        self, revision_id: str, after_version: int = -1, timeout: Optional[float] = None
+    ) -> Optional[dict]:
+        """
+        A revision's state once its version is past `after_version`, it is
+        finished or `timeout` seconds have passed, from whichever worker runs it.
+
+        Returns:
+            The revision as a dictionary (see Revision.as_dict), or None if unknown
+        """
+        revision = self.get(revision_id)
+        if revision is not None:
+            await revision.wait_for_change(after_version, timeout)
+            return revision.as_dict()
+        if not self.persist:
+            return None
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            state = await run_in_threadpool(read_revision, revision_id)
+            if state is None or state["version"] > after_version or state["finished"]:
+                return state
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return state
+            poll = REVISION_POLL_SECONDS
+            await asyncio.sleep(poll if remaining is None else min(poll, remaining))
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Wait up to `timeout` seconds for pending writes.
+        """
+        try:
+            self._writer.submit(lambda: None).result(timeout)
+        except FutureTimeout:
+            print("Error flushing revisions: timed out")
+
+    def __len__(self) -> int:
+        return len(self._revisions)
+
+    def _write(self, revision: Revision) -> None:
+        self._submit(write_revision, revision.as_dict(), time.time())
+
+    def _submit(self, fn: Callable, *args) -> None:
+        try:
+            self._writer.submit(fn, *args)
+        except RuntimeError:
+            # The interpreter is shutting down
+            pass
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        cutoff = now - self.ttl_seconds
+        excess = len(self._revisions) - self.max_entries
+        for revision_id, revision in list(self._revisions.items()):
+            if revision.finished and (revision.updated < cutoff or excess > 0):
+                del self._revisions[revision_id]
+                excess -= 1
+        if self.persist and now - self._purged >= self.ttl_seconds / 10:
+            self._purged = now
+            self._submit(delete_revisions, time.time() - self.ttl_seconds)
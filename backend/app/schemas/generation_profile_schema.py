@@ -0,0 +1,40 @@
+"""
+Pydantic models for generation profile requests and responses.
+"""
+import enum
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class GenerationStage(enum.Enum):
+    reasoner = 'reasoner'
+    verifier = 'verifier'
+    correction = 'correction'
+
+
+class GenerationProfileUpdate(BaseModel):
+    """
+    Request model for setting a stage's generation options.
+    Fields left unset (or null) fall back to the built-in defaults.
+    """
+    num_predict: Optional[int] = Field(
+        None, ge=-2, description="Maximum tokens to generate (-1 = unlimited)"
+    )
+    num_ctx: Optional[int] = Field(None, ge=256, description="Context window size in tokens")
+    temperature: Optional[float] = Field(None, ge=0, le=2)
+    top_p: Optional[float] = Field(None, gt=0, le=1)
+    top_k: Optional[int] = Field(None, ge=1)
+    stop: Optional[List[str]] = Field(None, description="Stop sequences")
+
+
+class GenerationProfileResponse(BaseModel):
+    """
+    Response model for a stage's effective generation options.
+    """
+    stage: GenerationStage
+    options: dict = Field(
+        ..., description="Options sent to Ollama (defaults merged with overrides)"
+    )
+    overrides: dict = Field(default_factory=dict, description="Options stored in the database")
+    updated_at: Optional[datetime] = None
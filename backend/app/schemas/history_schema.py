@@ -0,0 +1,35 @@
+"""
+Pydantic models for query history responses.
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class HistoryEntry(BaseModel):
+    """
+    Response model for one answered query.
+    """
+    id: int
+    session_id: Optional[str] = None
+    query: str
+    answer: str
+    verdict_ok: Optional[bool] = None
+    verdict_issues: Optional[str] = None
+    verified: bool
+    partial: bool
+    latency_seconds: float
+    mode: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class HistoryPage(BaseModel):
+    """
+    Response model for a page of history, newest first.
+    """
+    items: List[HistoryEntry]
+    next_cursor: Optional[int] = Field(
+        None, description="Pass as `before` to fetch the next page (null on the last page)"
+    )
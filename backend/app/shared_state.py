@@ -0,0 +1,231 @@
+"""
+State shared between uvicorn worker processes on one host.
+
+Each worker keeps its own caches and counters in memory. To keep them
+coherent across `--workers N` without an external service, workers use
+the SQLite database they already share:
+
+- Writers bump a per-key change counter (`state_versions`) in the same
+  transaction as their change (see `bump_version`).
+- A watcher thread polls `PRAGMA data_version`, which changes whenever
+  another connection commits, and only then re-reads `state_versions`.
+  Caches tagged with an older version are reloaded on next use, so
+  changes propagate to every worker within SHARED_STATE_POLL_SECONDS.
+- The same thread flushes this worker's counters to `worker_metrics`
+  every METRICS_FLUSH_SECONDS, where they can be summed across workers,
+  and deletes the rows of workers that stopped flushing (restarted or
+  reloaded processes) after WORKER_STALE_SECONDS.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.config import METRICS_FLUSH_SECONDS, SHARED_STATE_POLL_SECONDS, WORKER_STALE_SECONDS
+from app.database import SessionLocal, engine
+# Registers the shared state tables with Base.metadata for init_db()
+from app.models.shared_state_model import StateVersion, WorkerMetric  # noqa: F401
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{int(time.time())}"
+
+_versions_lock = threading.Lock()
+_versions: Dict[str, int] = {}
+_watcher: Optional["_Watcher"] = None
+
+
+def get_version(key: str) -> int:
+    """
+    Return the latest known version of a piece of shared state.
+    """
+    return _versions.get(key, 0)
+
+
+def _set_version(key: str, version: int) -> None:
+    with _versions_lock:
+        if version > _versions.get(key, 0):
+            _versions[key] = version
+
+
+def bump_version(db: Session, key: str) -> None:
+    """
+    Mark `key` as changed as part of the session's current transaction.
+    This worker sees the new version as soon as the transaction commits;
+    other workers see it on their next poll.
+
+    Args:
+        db: The session making the change (the bump commits or rolls back with it)
+        key: Name of the changed state (e.g., 'prompts')
+    """
+    db.execute(
+        text(
+            "INSERT INTO state_versions (key, version) VALUES (:key, 1) "
+            "ON CONFLICT (key) DO UPDATE SET version = state_versions.version + 1"
+        ),
+        {"key": key},
+    )
+    version = db.execute(
+        text("SELECT version FROM state_versions WHERE key = :key"), {"key": key}
+    ).scalar_one()
+    event.listen(db, "after_commit", lambda _session: _set_version(key, version), once=True)
+
+
+class VersionedCache:
+    """
+    Per-worker cache that is invalidated whenever a shared state key changes.
+    Loader failures are raised to the caller and not cached.
+
+    Args:
+        key: Shared state key whose version invalidates the cache
+        name: Name used in hit/miss counters (defaults to the key)
+        max_entries: Entries kept before the cache is cleared
+    """
+
+    def __init__(self, key: str, name: Optional[str] = None, max_entries: int = 1024):
+        self.key = key
+        self.name = name or key
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+
+    def get(self, item: Hashable, loader: Callable[[], Any]) -> Any:
+        version = get_version(self.key)
+        entry = self._entries.get(item)
+        if entry is not None and entry[0] == version:
+            metrics.incr(f"cache.{self.name}.hits")
+            return entry[1]
+        metrics.incr(f"cache.{self.name}.misses")
+        value = loader()
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[item] = (version, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _sqlite_path() -> Optional[str]:
+    if engine.url.get_backend_name() != "sqlite":
+        return None
+    database = engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return database
+
+
+class _Watcher(threading.Thread):
+    def __init__(self, path: str, interval: float):
+        super().__init__(name="shared-state-watcher", daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._data_version: Optional[int] = None
+        self._flushed: Dict[str, float] = {}
+        self._flushed_at = 0.0
+
+    def run(self) -> None:
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            while True:
+                try:
+                    self.poll(connection)
+                    if time.time() - self._flushed_at >= METRICS_FLUSH_SECONDS:
+                        self.flush_metrics(connection)
+                except sqlite3.Error as e:
+                    print(f"Error syncing shared state: {e}")
+                if self._stop_event.wait(self.interval):
+                    break
+            self.flush_metrics(connection)
+        finally:
+            connection.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def poll(self, connection: sqlite3.Connection) -> None:
+        data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        for key, version in connection.execute("SELECT key, version FROM state_versions"):
+            _set_version(key, version)
+
+    def flush_metrics(self, connection: sqlite3.Connection) -> None:
+        counters = metrics.snapshot()
+        now = time.time()
+        changed = [name for name, value in counters.items() if self._flushed.get(name) != value]
+        if now - self._flushed_at >= WORKER_STALE_SECONDS / 3:
+            # Refresh every row now and then so live workers are not reported as gone
+            changed = list(counters)
+        if not changed:
+            return
+        with connection:
+            connection.executemany(
+                "INSERT INTO worker_metrics (worker_id, name, value, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (worker_id, name) DO UPDATE "
+                "SET value = excluded.value, updated_at = excluded.updated_at",
+                [(WORKER_ID, name, counters[name], now) for name in changed],
+            )
+            # Rows of workers that are gone would otherwise be summed forever
+            connection.execute(
+                "DELETE FROM worker_metrics WHERE updated_at < ?", (now - WORKER_STALE_SECONDS,)
+            )
+        self._flushed = counters
+        self._flushed_at = now
+
+
+def start() -> None:
+    """
+    Start watching for changes from other workers.
+    Call this during application startup, after the tables exist.
+    """
+    global _watcher
+    path = _sqlite_path()
+    if path is None:
+        print("Shared state sync disabled: DATABASE_URL is not a SQLite file")
+        return
+    if _watcher is None:
+        metrics.incr("workers.started")
+        _watcher = _Watcher(path, SHARED_STATE_POLL_SECONDS)
+        _watcher.start()
+
+
+def stop() -> None:
+    """
+    Stop the watcher, flushing this worker's counters one last time.
+    """
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher.join(timeout=5)
+        _watcher = None
+
+
+def aggregate_metrics() -> dict:
+    """
+    Sum the flushed counters of the workers running against this database.
+    Counters of workers that stopped less than WORKER_STALE_SECONDS ago are
+    still included.
+
+    Returns:
+        A dictionary with the summed 'counters' and the number of live 'workers'
+        (those that flushed within WORKER_STALE_SECONDS)
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("SELECT name, SUM(value) FROM worker_metrics GROUP BY name ORDER BY name")
+        ).all()
+        workers = db.execute(
+            text("SELECT COUNT(DISTINCT worker_id) FROM worker_metrics WHERE updated_at >= :since"),
+            {"since": time.time() - WORKER_STALE_SECONDS},
+        ).scalar_one()
+        return {"counters": {name: value for name, value in rows}, "workers": workers}
+    finally:
+        db.close()
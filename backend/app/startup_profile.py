@@ -0,0 +1,113 @@
+"""
+Startup profiling report.
+
+Breaks worker cold-start time down into module import time (via
+`python -X importtime`) and lifespan steps, and measures how long it takes
+until the app answers /health.
+
+Usage:
+    python -m app.startup_profile [--top 15] [--target 1.0]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+DEFAULT_TARGET_SECONDS = 1.0
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse `-X importtime` output into (module, self_us, cumulative_us) rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_breakdown(rows: List[Tuple[str, int, int]]) -> Dict[str, float]:
+    """
+    Sum self import time per top-level package, in seconds.
+    Modules of this application are kept at full dotted-name granularity.
+    """
+    totals: Dict[str, float] = defaultdict(float)
+    for module, self_us, _ in rows:
+        key = module if module.startswith("app.") or module == "app" else module.split(".")[0]
+        totals[key] += self_us / 1_000_000
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def measure_cold_start() -> dict:
+    """
+    Measure import, lifespan and first /health time in a fresh interpreter.
+    """
+    code = (
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "import app.main\n"
+        "imported = time.perf_counter()\n"
+        "from starlette.testclient import TestClient\n"
+        "helper = time.perf_counter()\n"
+        "with TestClient(app.main.app) as client:\n"
+        "    started = time.perf_counter()\n"
+        "    client.get('/health').raise_for_status()\n"
+        "    served = time.perf_counter()\n"
+        "print(json.dumps({\n"
+        "    'import': imported - start,\n"
+        "    'lifespan': started - helper,\n"
+        "    'lifespan_steps': app.main.app.state.startup_timings,\n"
+        "    'first_health': served - started,\n"
+        "    'ready': (imported - start) + (served - helper),\n"
+        "}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="Number of import rows to show")
+    parser.add_argument(
+        "--target", type=float, default=DEFAULT_TARGET_SECONDS,
+        help="Seconds within which a worker must be ready to serve /health",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    importtime = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    breakdown = import_breakdown(parse_importtime(importtime.stderr))
+    cold_start = measure_cold_start()
+
+    print("Import time by module (self time, seconds)")
+    for module, seconds in list(breakdown.items())[:args.top]:
+        print(f"  {module:<40} {seconds:8.3f}")
+    print()
+    print("Cold start (seconds)")
+    print(f"  {'import app.main':<40} {cold_start['import']:8.3f}")
+    print(f"  {'lifespan startup':<40} {cold_start['lifespan']:8.3f}")
+    for step, seconds in cold_start["lifespan_steps"].items():
+        print(f"    {step:<38} {seconds:8.3f}")
+    print(f"  {'first /health':<40} {cold_start['first_health']:8.3f}")
+    print(f"  {'ready to serve /health':<40} {cold_start['ready']:8.3f}")
+    print()
+
+    ok = cold_start["ready"] < args.target
+    print(f"Target {args.target:.3f}s: {'OK' if ok else 'EXCEEDED'} "
+          f"(report took {time.perf_counter() - started:.1f}s)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Opt-in recording of agent graph executions for offline replay.
+
+When TRACE_RECORD_PATH is set, every graph execution is appended to that
+file as one JSON line. Each line holds the query, the active prompt IDs,
+per-node latencies and per-generation model, latency and token counts.
+Records are handed to a background thread, so requests never wait on disk.
+The thread writes each batch as a separate gzip member, which standard gzip
+readers (and `read_traces`) treat as one continuous stream. Each member goes
+out in a single append, so several workers can share one file.
+
+See app.replay for re-running a recording against the current pipeline.
+"""
+import gzip
+import json
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from app import metrics
+from app.config import TRACE_QUEUE_SIZE, TRACE_RECORD_PATH
+from app.graph.run_context import RunContext
+
+TRACE_FORMAT_VERSION = 1
+
+_recorder: Optional["_Recorder"] = None
+
+
+def build_record(
+    query: str,
+    context: RunContext,
+    prompt_set: Sequence[Tuple[int, str]],
+    started_at: float,
+    duration: float,
+    status: str,
+) -> dict:
+    """
+    Describe one graph execution as a JSON-serializable trace record.
+
+    Args:
+        query: The user query
+        context: The execution's run context
+        prompt_set: Active prompts as returned by get_active_prompt_set()
+        started_at: Wall-clock start time (epoch seconds)
+        duration: Seconds the execution took
+        status: 'ok', 'cancelled' or 'failed'
+    """
+    return {
+        "v": TRACE_FORMAT_VERSION,
+        "ts": round(started_at, 4),
+        "query": query,
+        "prompt_ids": [prompt_id for prompt_id, _ in prompt_set],
+        "status": status,
+        "duration": round(duration, 4),
+        "stages": {
+            entry.node: {"status": entry.status, "duration": entry.as_dict()["duration"]}
+            for entry in context.trace
+        },
+        "generations": list(context.generations),
+        "prompt_tokens": context.prompt_tokens,
+        "completion_tokens": context.completion_tokens,
+    }
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def record(entry: dict) -> None:
+    """
+    Queue a trace record for writing; a no-op unless recording is enabled.
+    """
+    if _recorder is None:
+        return
+    try:
+        _recorder.queue.put_nowait(entry)
+    except queue.Full:
+        metrics.incr("trace_recorder.dropped")
+
+
+def read_traces(path: str) -> Iterator[dict]:
+    """
+    Yield the records of a trace file in the order they were written.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class _Recorder(threading.Thread):
+    def __init__(self, path: str, max_queued: int):
+        super().__init__(name="trace-recorder", daemon=True)
+        self.path = path
+        self.queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queued)
+
+    def run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[dict] = []
+            entry = self.queue.get()
+            # Drain whatever else is waiting so each write covers a batch
+            while entry is not None:
+                batch.append(entry)
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = entry is None
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[dict]) -> None:
+        lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in batch)
+        try:
+            with open(self.path, "ab") as f:
+                f.write(gzip.compress(lines.encode("utf-8")))
+            metrics.incr("trace_recorder.records", len(batch))
+        except OSError as e:
+            metrics.incr("trace_recorder.dropped", len(batch))
+            print(f"Error writing traces to {self.path}: {e}")
+
+
+def start(path: Optional[str] = TRACE_RECORD_PATH) -> None:
+    """
+    Start recording to `path` (does nothing if it is empty).
+    """
+    global _recorder
+    if not path or _recorder is not None:
+        return
+    _recorder = _Recorder(path, TRACE_QUEUE_SIZE)
+    _recorder.start()
+
+
+def stop(timeout: float = 5.0) -> None:
+    """
+    Write out queued records and stop recording.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return
+    deadline = time.monotonic() + timeout
+    try:
+        recorder.queue.put(None, timeout=timeout)
+    except queue.Full:
+        return
+    recorder.join(max(0.0, deadline - time.monotonic()))
@@ -15,6 +15,7 @@ setup(
         "fastapi>=0.104.0",
         "uvicorn>=0.24.0",
         "pydantic>=2.0.0",
+        "orjson>=3.9.0",
         "python-dotenv>=1.0.0",
         "ollama>=0.1.0",
         "sentence-transformers>=2.2.0",
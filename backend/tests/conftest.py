@@ -0,0 +1,50 @@
+"""
+Shared test setup.
+
+The databases point at a temporary directory before any app module is
+imported, so tests never touch prompts.db, history.db or revisions.db.
+"""
+import os
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="assistant-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'prompts.db')}"
+os.environ["HISTORY_DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'history.db')}"
+os.environ["REVISIONS_DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'revisions.db')}"
+
+import pytest  # noqa: E402
+
+from app.agents import registry  # noqa: E402
+
+
+@pytest.fixture
+def fake_agents():
+    """
+    Register stand-in agents for a test: `fake_agents(name, agent)`.
+    The original registrations are restored afterwards.
+    """
+    factories = dict(registry._factories)
+    instances = dict(registry._instances)
+
+    def register(name, agent):
+        registry.register_agent(name, lambda: agent)
+
+    yield register
+    with registry._lock:
+        registry._factories.clear()
+        registry._factories.update(factories)
+        registry._instances.clear()
+        registry._instances.update(instances)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    A TestClient for the application, with startup and shutdown run once.
+    """
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,203 @@
+import threading
+import time
+
+import pytest
+
+from app.graph.engine import Graph, GraphError, Node, NodeTimeout
+from app.graph.run_context import RunContext
+from app.llm.local_llm import GenerationCancelled
+
+
+def test_nodes_run_after_their_inputs():
+    order = []
+    lock = threading.Lock()
+
+    def step(name, value):
+        with lock:
+            order.append(name)
+        return value
+
+    graph = Graph([
+        Node("join", lambda left, right: step("join", left + right),
+             inputs=("left", "right"), outputs=("joined",)),
+        Node("left", lambda start: step("left", start + "L"),
+             inputs=("start",), outputs=("left",)),
+        Node("right", lambda start: step("right", start + "R"),
+             inputs=("start",), outputs=("right",)),
+        Node("start", lambda: step("start", "S"), outputs=("start",)),
+    ])
+
+    run = graph.run({})
+
+    assert run.values["joined"] == "SLSR"
+    assert order[0] == "start"
+    assert order[-1] == "join"
+    assert [entry.status for entry in run.trace] == ["ok"] * 4
+
+
+def test_independent_nodes_run_concurrently():
+    # Each node waits for the other; this only passes if they overlap
+    barrier = threading.Barrier(2, timeout=2)
+
+    def meet(name):
+        barrier.wait()
+        return name
+
+    graph = Graph([
+        Node("a", lambda: meet("a"), outputs=("a",)),
+        Node("b", lambda: meet("b"), outputs=("b",)),
+    ])
+
+    assert graph.run({}).values == {"a": "a", "b": "b", "context": None}
+
+
+def test_failed_attempts_are_retried():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("transient")
+        return "done"
+
+    graph = Graph([Node("flaky", flaky, outputs=("result",), retries=2)])
+
+    run = graph.run({})
+
+    assert run.values["result"] == "done"
+    assert run.trace[0].attempts == 3
+
+
+def test_exhausted_retries_raise_graph_error():
+    def broken():
+        raise RuntimeError("permanent")
+
+    graph = Graph([Node("broken", broken, outputs=("result",), retries=1)])
+    context = RunContext()
+
+    with pytest.raises(GraphError) as excinfo:
+        graph.run({}, context=context)
+
+    assert excinfo.value.node == "broken"
+    assert context.trace[0].status == "failed"
+    assert context.trace[0].attempts == 2
+
+
+def test_timed_out_attempt_is_retried():
+    calls = []
+
+    def slow_once():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(1)
+        return "fast"
+
+    graph = Graph([Node("slow", slow_once, outputs=("result",), timeout=0.1, retries=1)])
+
+    run = graph.run({})
+
+    assert run.values["result"] == "fast"
+    assert run.trace[0].attempts == 2
+
+
+def test_timeout_without_retries_fails_the_run():
+    graph = Graph([Node("hung", lambda: time.sleep(1), outputs=("result",), timeout=0.1)])
+
+    with pytest.raises(GraphError) as excinfo:
+        graph.run({})
+
+    assert isinstance(excinfo.value.cause, NodeTimeout)
+
+
+def test_cancelled_context_starts_no_node():
+    calls = []
+    graph = Graph([Node("never", lambda: calls.append(1), outputs=("result",))])
+    context = RunContext()
+    context.cancel()
+
+    with pytest.raises(GenerationCancelled):
+        graph.run({}, context=context)
+
+    assert calls == []
+
+
+def test_unknown_input_is_rejected():
+    graph = Graph([Node("orphan", lambda missing: missing, inputs=("missing",), outputs=("x",))])
+
+    with pytest.raises(ValueError):
+        graph.run({})
+
+
+def test_memoized_node_reuses_outputs_for_identical_inputs():
+    calls = []
+
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    graph = Graph([Node("double", double, inputs=("value",), outputs=("result",), memoize=True)])
+
+    first = graph.run({"value": 2})
+    second = graph.run({"value": 2})
+    other = graph.run({"value": 3})
+
+    assert calls == [2, 3]
+    assert first.values["result"] == second.values["result"] == 4
+    assert other.values["result"] == 6
+    assert [run.trace[0].memoized for run in (first, second, other)] == [False, True, False]
+
+
+def test_memo_key_ignores_the_run_context():
+    calls = []
+
+    def echo(value, context):
+        calls.append(context)
+        return value
+
+    graph = Graph([
+        Node("echo", echo, inputs=("value", "context"), outputs=("result",), memoize=True)
+    ])
+
+    graph.run({"value": "same"}, context=RunContext())
+    graph.run({"value": "same"}, context=RunContext())
+
+    assert len(calls) == 1
+
+
+def test_unhashable_inputs_and_failures_are_not_memoized():
+    calls = []
+
+    def count(value):
+        calls.append(value)
+        if value == "fail" and calls.count("fail") == 1:
+            raise RuntimeError("first attempt fails")
+        return len(calls)
+
+    graph = Graph([Node("count", count, inputs=("value",), outputs=("result",), memoize=True)])
+
+    graph.run({"value": ["unhashable"]})
+    graph.run({"value": ["unhashable"]})
+    with pytest.raises(GraphError):
+        graph.run({"value": "fail"})
+    graph.run({"value": "fail"})
+
+    assert len(calls) == 4
+
+
+def test_memo_drops_the_least_recently_used_entry():
+    calls = []
+
+    def identity(value):
+        calls.append(value)
+        return value
+
+    graph = Graph(
+        [Node("identity", identity, inputs=("value",), outputs=("result",), memoize=True)],
+        memo_size=2,
+    )
+
+    for value in ("a", "b", "a", "c", "a", "b"):
+        graph.run({"value": value})
+
+    # "b" was evicted when "c" arrived; "a" stayed because it was used again
+    assert calls == ["a", "b", "c", "b"]
@@ -0,0 +1,44 @@
+import pytest
+
+from app.config import GENERATION_PROFILES
+from app.generation_profiles import get_generation_options, profile_overrides
+from app.models.generation_profile_model import GenerationProfile
+
+
+@pytest.fixture
+def reasoner_profile(client):
+    yield
+    client.delete("/profiles/reasoner")
+
+
+def test_stages_without_overrides_use_the_defaults(client):
+    client.delete("/profiles/verifier")
+
+    assert get_generation_options("verifier") == GENERATION_PROFILES["verifier"]
+    assert get_generation_options("unknown") == {}
+
+
+def test_stored_overrides_are_merged_over_the_defaults(client, reasoner_profile):
+    response = client.put("/profiles/reasoner", json={"temperature": 0.1, "stop": ["\n\n"]})
+    assert response.status_code == 200
+
+    options = get_generation_options("reasoner")
+
+    assert options == {**GENERATION_PROFILES["reasoner"], "temperature": 0.1, "stop": ["\n\n"]}
+    assert response.json()["overrides"] == {"temperature": 0.1, "stop": ["\n\n"]}
+
+
+def test_reset_reverts_to_the_defaults(client, reasoner_profile):
+    client.put("/profiles/reasoner", json={"num_ctx": 8192})
+    assert get_generation_options("reasoner")["num_ctx"] == 8192
+
+    client.delete("/profiles/reasoner")
+
+    assert get_generation_options("reasoner") == GENERATION_PROFILES["reasoner"]
+
+
+def test_overrides_skip_unset_columns_and_decode_stop():
+    profile = GenerationProfile(stage="reasoner", num_predict=64, stop='["END"]')
+
+    assert profile_overrides(profile) == {"num_predict": 64, "stop": ["END"]}
+    assert profile_overrides(None) == {}
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from app import history
+from app.database import history_engine, init_history_db
+from app.models.history_model import QueryHistory
+
+
+@pytest.fixture(autouse=True)
+def empty_history():
+    init_history_db()
+    with history_engine.begin() as connection:
+        connection.execute(text("DELETE FROM query_history"))
+
+
+def add_entries(user_id: str, count: int, session_id=None, age_days: float = 0) -> None:
+    created_at = datetime.utcnow() - timedelta(days=age_days)
+    with history_engine.begin() as connection:
+        connection.execute(insert(QueryHistory), [
+            {
+                "user_id": user_id,
+                "session_id": session_id,
+                "query": f"question {i}",
+                "answer": f"answer {i}",
+                "latency_seconds": 0.1,
+                "mode": "test",
+                "created_at": created_at,
+            }
+            for i in range(count)
+        ])
+
+
+def queries(entries) -> list:
+    return [entry.query for entry in entries]
+
+
+def test_pages_follow_the_cursor_newest_first():
+    add_entries("key:alice", 5)
+    add_entries("key:bob", 2)
+
+    first, cursor = history.get_page("key:alice", limit=2)
+    second, cursor2 = history.get_page("key:alice", before=cursor, limit=2)
+    last, end = history.get_page("key:alice", before=cursor2, limit=2)
+
+    assert queries(first) == ["question 4", "question 3"]
+    assert queries(second) == ["question 2", "question 1"]
+    assert queries(last) == ["question 0"]
+    assert end is None
+    assert all(entry.user_id == "key:alice" for entry in first + second + last)
+
+
+def test_exactly_full_last_page_has_no_cursor():
+    add_entries("key:alice", 4)
+
+    _, cursor = history.get_page("key:alice", limit=2)
+    page, end = history.get_page("key:alice", before=cursor, limit=2)
+
+    assert len(page) == 2
+    assert end is None
+
+
+def test_session_filter_lists_only_that_session():
+    add_entries("key:alice", 2, session_id="morning")
+    add_entries("key:alice", 3, session_id="evening")
+    add_entries("key:bob", 1, session_id="morning")
+
+    entries, cursor = history.get_page("key:alice", session_id="morning")
+
+    assert len(entries) == 2
+    assert {entry.session_id for entry in entries} == {"morning"}
+    assert cursor is None
+
+
+def test_prune_deletes_entries_older_than_the_retention():
+    add_entries("key:alice", 3, age_days=10)
+    add_entries("key:alice", 2, age_days=1)
+
+    deleted = history.prune(retention_days=5, max_per_user=100)
+
+    entries, _ = history.get_page("key:alice")
+    assert deleted == 3
+    assert len(entries) == 2
+
+
+def test_prune_keeps_each_users_newest_entries():
+    add_entries("key:alice", 5)
+    add_entries("key:bob", 2)
+
+    deleted = history.prune(retention_days=30, max_per_user=3)
+
+    alice, _ = history.get_page("key:alice")
+    bob, _ = history.get_page("key:bob")
+    assert deleted == 2
+    assert queries(alice) == ["question 4", "question 3", "question 2"]
+    assert len(bob) == 2
+
+
+def test_prune_deletes_in_chunks(monkeypatch):
+    monkeypatch.setattr(history, "PRUNE_CHUNK_SIZE", 2)
+    add_entries("key:alice", 5, age_days=10)
+
+    assert history.prune(retention_days=5, max_per_user=100) == 5
+    assert history.get_page("key:alice") == ([], None)
@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import event
+
+from app import http_cache, shared_state
+from app.database import SessionLocal, engine
+from app.models.prompt_model import Prompt
+from app.prompts_loader import PROMPTS_STATE_KEY
+
+
+def add_prompt(tag: str) -> int:
+    """
+    Write a prompt the way the write endpoints do, bumping the prompts version.
+    """
+    db = SessionLocal()
+    try:
+        shared_state.bump_version(db, PROMPTS_STATE_KEY)
+        prompt = Prompt(
+            title=f"Prompt {tag}", content="Answer briefly.", type="Base Model", tags=tag
+        )
+        db.add(prompt)
+        db.commit()
+        return prompt.id
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def queries():
+    """
+    Count the SQL statements run on the prompts database.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_list_sends_an_etag_that_depends_on_the_query(client):
+    add_prompt("cache-etag")
+
+    first = client.get("/prompts", params={"tags": "cache-etag"})
+    again = client.get("/prompts", params={"tags": "cache-etag"})
+    other_page = client.get("/prompts", params={"tags": "cache-etag", "page": 2})
+
+    assert first.status_code == 200
+    assert first.headers["etag"].startswith('"')
+    assert first.headers["cache-control"] == "no-cache"
+    assert again.headers["etag"] == first.headers["etag"]
+    assert other_page.headers["etag"] != first.headers["etag"]
+
+
+def test_matching_if_none_match_returns_304_without_a_query(client, queries):
+    add_prompt("cache-304")
+    etag = client.get("/prompts", params={"tags": "cache-304"}).headers["etag"]
+    queries.clear()
+
+    response = client.get(
+        "/prompts", params={"tags": "cache-304"}, headers={"If-None-Match": f"W/{etag}"}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert queries == []
+
+
+def test_gzip_and_identity_bodies_have_paired_etags(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "GZIP_MIN_BYTES", 0)
+    params = {"tags": "cache-gzip"}
+    add_prompt("cache-gzip")
+
+    identity = client.get("/prompts", params=params, headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/prompts", params=params, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in identity.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["vary"] == "Accept-Encoding"
+    assert zipped.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+    # The client decodes the gzipped body transparently
+    assert zipped.content == identity.content
+
+    # Either ETag revalidates either coding, since the content is the same
+    revalidated = client.get(
+        "/prompts",
+        params=params,
+        headers={"Accept-Encoding": "identity", "If-None-Match": zipped.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == identity.headers["etag"]
+
+
+def test_prompt_write_invalidates_cached_lists(client):
+    params = {"tags": "cache-invalidate"}
+    prompt_id = add_prompt("cache-invalidate")
+    before = client.get("/prompts", params=params)
+    assert before.json()["total"] == 1
+
+    add_prompt("cache-invalidate")
+    after_create = client.get(
+        "/prompts", params=params, headers={"If-None-Match": before.headers["etag"]}
+    )
+    assert after_create.status_code == 200
+    assert after_create.json()["total"] == 2
+    assert after_create.headers["etag"] != before.headers["etag"]
+
+    assert client.delete(f"/prompts/{prompt_id}").status_code == 200
+    after_delete = client.get(
+        "/prompts", params=params, headers={"If-None-Match": after_create.headers["etag"]}
+    )
+    assert after_delete.status_code == 200
+    assert after_delete.json()["total"] == 1
+
+
+def test_missing_prompt_is_not_cached(client, queries):
+    missing = client.get("/prompts/999999")
+    assert missing.status_code == 404
+    assert "etag" not in missing.headers
+    queries.clear()
+
+    assert client.get("/prompts/999999").status_code == 404
+    assert queries
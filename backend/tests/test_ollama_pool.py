@@ -0,0 +1,190 @@
+"""
+Runs the pool against fake Ollama servers on local ports.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from ollama import ResponseError
+
+from app import metrics
+from app.llm.pool import OllamaPool
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_ollama(*args: str):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.llm.fake_ollama", "--port", str(port),
+         "--tokens-per-second", "1000", *args],
+        cwd=BACKEND_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            httpx.get(url, timeout=1)
+            return process, url
+        except httpx.TransportError:
+            if time.time() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError(f"fake Ollama on port {port} did not start")
+            time.sleep(0.1)
+
+
+@pytest.fixture(scope="module")
+def hosts():
+    """
+    Two working hosts, the first with 'warm' loaded, and one that fails
+    every chat but has 'sticky' loaded so affinity routes to it first.
+    """
+    servers = [
+        start_fake_ollama("--models", "warm"),
+        start_fake_ollama(),
+        start_fake_ollama("--fail-rate", "1", "--models", "sticky"),
+    ]
+    yield [url for _process, url in servers]
+    for process, _url in servers:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(urls, **kwargs):
+        pool = OllamaPool(urls, health_interval=60, **kwargs)
+        pools.append(pool)
+        # Wait for the first health check so it cannot overwrite what a test sets up
+        deadline = time.time() + 10
+        while any(host.last_checked is None for host in pool.hosts) and time.time() < deadline:
+            time.sleep(0.01)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def requests_per_host(before: dict, urls) -> list:
+    after = metrics.snapshot()
+    return [
+        after.get(f"ollama.requests.{url}", 0) - before.get(f"ollama.requests.{url}", 0)
+        for url in urls
+    ]
+
+
+def load_only_on_first_host(pool, model):
+    for host in pool.hosts:
+        host.loaded_models.discard(model)
+    pool.hosts[0].loaded_models.add(model)
+
+
+def chat(pool, model, **kwargs):
+    return pool.chat(model=model, messages=[{"role": "user", "content": "hi"}], **kwargs)
+
+
+def test_requests_go_to_the_least_loaded_host(hosts, make_pool):
+    working = hosts[:2]
+    pool = make_pool(working, affinity_weight=0)
+
+    streams = [chat(pool, "any", stream=True, options={"num_predict": 8}) for _ in range(4)]
+    for stream in streams:
+        next(stream)
+
+    assert [host.outstanding for host in pool.hosts] == [2, 2]
+
+    for stream in streams:
+        stream.close()
+    assert [host.outstanding for host in pool.hosts] == [0, 0]
+
+
+def test_hosts_with_the_model_loaded_are_preferred(hosts, make_pool):
+    working = hosts[:2]
+    pool = make_pool(working)
+    before = metrics.snapshot()
+
+    for _ in range(3):
+        chat(pool, "warm")
+
+    assert requests_per_host(before, working) == [3, 0]
+
+
+def test_failed_call_is_retried_on_another_host(hosts, make_pool):
+    pool = make_pool([hosts[2], hosts[1]])
+    load_only_on_first_host(pool, "sticky")
+    before = metrics.snapshot()
+
+    response = chat(pool, "sticky")
+
+    assert response.done
+    assert requests_per_host(before, [hosts[2], hosts[1]]) == [0, 1]
+    assert metrics.snapshot()["ollama.retries"] == before.get("ollama.retries", 0) + 1
+    assert pool.hosts[0].healthy is False
+
+
+def test_stream_is_retried_before_anything_was_yielded(hosts, make_pool):
+    pool = make_pool([hosts[2], hosts[1]])
+    load_only_on_first_host(pool, "sticky")
+
+    text = "".join(chunk.message.content for chunk in chat(pool, "sticky", stream=True))
+
+    assert text
+    assert pool.hosts[0].failures == 1
+
+
+def test_non_idempotent_call_is_not_retried(hosts, make_pool):
+    pool = make_pool([hosts[2], hosts[1]])
+    load_only_on_first_host(pool, "sticky")
+    before = metrics.snapshot()
+
+    with pytest.raises(ResponseError):
+        chat(pool, "sticky", idempotent=False)
+
+    assert requests_per_host(before, [hosts[2], hosts[1]]) == [0, 0]
+
+
+def test_health_check_marks_hosts_up_and_down(hosts, make_pool):
+    unreachable = f"http://127.0.0.1:{free_port()}"
+    pool = make_pool([hosts[2], unreachable])
+    failing, down = pool.hosts
+
+    load_only_on_first_host(pool, "sticky")
+
+    with pytest.raises((ConnectionError, httpx.TransportError)):
+        chat(pool, "sticky")
+    assert failing.healthy is False
+
+    pool.check_health()
+
+    # The failing host still answers /api/ps, so it counts as up again
+    assert failing.healthy is True
+    assert "sticky" in failing.loaded_models
+    assert down.healthy is False
+    assert down.last_checked is not None
+
+
+def test_single_host_recovers_after_a_failure(hosts, make_pool):
+    pool = make_pool([hosts[1]])
+    host = pool.hosts[0]
+
+    # A 503 from a busy host is retryable, so it marks the host down
+    pool._failed(host, ResponseError("busy", 503))
+    assert host.healthy is False
+    assert pool._health_thread.is_alive()
+
+    chat(pool, "any")
+
+    assert host.healthy is True
@@ -0,0 +1,108 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import rate_limit
+from app.rate_limit import (
+    RateLimitMiddleware,
+    TokenRateLimiter,
+    client_key,
+    record_token_usage,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", fake)
+    return fake
+
+
+def test_new_client_starts_with_a_full_bucket(clock):
+    limiter = TokenRateLimiter(capacity=100, refill_per_second=10)
+
+    assert limiter.check("client") == (True, 100, 0.0)
+
+
+def test_charge_takes_tokens_and_may_go_negative(clock):
+    limiter = TokenRateLimiter(capacity=100, refill_per_second=10)
+
+    assert limiter.charge("client", 60) == 40
+    assert limiter.charge("client", 60) == -20
+
+    allowed, remaining, retry_after = limiter.check("client")
+    assert not allowed
+    assert remaining == -20
+    assert retry_after == pytest.approx(2.1)
+
+
+def test_bucket_refills_over_time_up_to_capacity(clock):
+    limiter = TokenRateLimiter(capacity=100, refill_per_second=10)
+    limiter.charge("client", 100)
+
+    clock.now += 3
+    assert limiter.check("client") == (True, 30, 0.0)
+
+    clock.now += 60
+    assert limiter.check("client") == (True, 100, 0.0)
+
+
+def test_clients_have_separate_buckets(clock):
+    limiter = TokenRateLimiter(capacity=100, refill_per_second=10)
+    limiter.charge("heavy", 150)
+
+    assert limiter.check("heavy")[0] is False
+    assert limiter.check("light")[0] is True
+
+
+def test_least_recently_seen_bucket_is_dropped(clock):
+    limiter = TokenRateLimiter(capacity=100, refill_per_second=10, max_clients=2)
+    limiter.charge("first", 100)
+    limiter.charge("second", 100)
+    limiter.charge("third", 100)
+
+    assert limiter.clients() == 2
+    assert limiter.check("first") == (True, 100, 0.0)
+
+
+def test_only_allowed_api_keys_identify_a_client():
+    allowed = frozenset({hashlib.sha256(b"secret").hexdigest()})
+
+    def scope(key: bytes):
+        return {"headers": [(b"x-api-key", key)], "client": ("10.0.0.1", 5000)}
+
+    assert client_key(scope(b"secret"), b"x-api-key", allowed).startswith("key:")
+    assert client_key(scope(b"made-up"), b"x-api-key", allowed) == "ip:10.0.0.1"
+    assert client_key(scope(b"secret"), b"x-api-key") == "ip:10.0.0.1"
+
+
+def test_middleware_charges_reported_usage_and_rejects_empty_buckets():
+    limiter = TokenRateLimiter(capacity=100, refill_per_second=0.001)
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, paths=["/generate"])
+
+    @app.post("/generate")
+    def generate(request: Request):
+        record_token_usage(request, 70)
+        return {"ok": True}
+
+    client = TestClient(app)
+    first = client.post("/generate")
+    second = client.post("/generate")
+    third = client.post("/generate")
+
+    assert first.headers["x-ratelimit-remaining"] == "30"
+    assert second.status_code == 200
+    assert second.headers["x-ratelimit-remaining"] == "0"
+    assert third.status_code == 429
+    assert int(third.headers["retry-after"]) > 0
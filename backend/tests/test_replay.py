@@ -0,0 +1,82 @@
+import gzip
+
+from app import trace_recorder
+from app.graph.engine import Graph, Node
+from app.graph.run_context import RunContext
+from app.replay import TOTAL, compare, format_report, stage_latencies
+
+
+def execution(query: str, model: str, seconds: float, status: str = "ok") -> dict:
+    """
+    Run a one-node graph and describe it the way the server records it.
+    """
+    context = RunContext()
+
+    def reason(context):
+        context.record_usage(10, 4, stage="reason", model=model, seconds=seconds)
+        return "answer"
+
+    Graph([Node("reason", reason, inputs=("context",), outputs=("answer",))]).run(
+        {}, context=context
+    )
+    return trace_recorder.build_record(
+        query, context, [(1, "reasoner")], started_at=1000.0, duration=seconds + 0.5, status=status
+    )
+
+
+def record_all(path: str, records) -> None:
+    trace_recorder.start(path)
+    for entry in records:
+        trace_recorder.record(entry)
+    trace_recorder.stop()
+
+
+def test_traces_round_trip_across_gzip_members(tmp_path):
+    path = str(tmp_path / "traces.ndjson.gz")
+    first = [execution("q1", "small", 1.0), execution("q2", "small", 2.0)]
+    second = [execution("q3", "small", 3.0, status="failed")]
+
+    # Each recording session appends at least one more gzip member
+    record_all(path, first)
+    record_all(path, second)
+
+    with open(path, "rb") as f:
+        assert f.read().count(b"\x1f\x8b") >= 2
+    records = list(trace_recorder.read_traces(path))
+    assert [entry["query"] for entry in records] == ["q1", "q2", "q3"]
+    assert records[0]["prompt_ids"] == [1]
+    latencies = stage_latencies(records[1])
+    assert latencies["gen:reason"] == 2.0
+    assert latencies[TOTAL] == 2.5
+    assert latencies["reason"] == records[1]["stages"]["reason"]["duration"]
+
+
+def test_compare_reports_deltas_for_completed_pairs(tmp_path):
+    path = str(tmp_path / "traces.ndjson.gz")
+    record_all(path, [execution("q1", "small", 1.0), execution("q2", "small", 3.0, "failed")])
+    recorded = list(trace_recorder.read_traces(path))
+    replayed = [execution("q1", "large", 1.5), execution("q2", "large", 1.0)]
+
+    report = compare(recorded, replayed)
+
+    # The failed recording is left out of every stage
+    assert report["gen:reason"]["n"] == 1
+    assert report["gen:reason"]["p50"] == {"recorded": 1.0, "replayed": 1.5, "delta": 0.5}
+    assert report["gen:reason"]["models"] == {"recorded": ["small"], "replayed": ["large"]}
+    assert report[TOTAL]["completion_tokens"] == {"recorded": 4, "replayed": 4}
+    assert "gen:reason model: small -> large" in format_report(report)
+
+
+def test_compare_is_empty_without_a_completed_pair():
+    recorded = [execution("q1", "small", 1.0), execution("q2", "small", 1.0)]
+    replayed = [None, execution("q2", "small", 1.0, status="failed")]
+
+    assert compare(recorded, replayed) == {}
+    assert compare([], []) == {}
+
+
+def test_empty_trace_file_has_no_records(tmp_path):
+    path = tmp_path / "empty.ndjson.gz"
+    path.write_bytes(gzip.compress(b""))
+
+    assert list(trace_recorder.read_traces(str(path))) == []
@@ -0,0 +1,130 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import revisions
+from app.database import init_revisions_db
+from app.revisions import Revision, RevisionStore
+
+
+@pytest.fixture
+def revisions_db():
+    init_revisions_db()
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_on_the_next_version():
+    revision = Revision()
+
+    async def answer_later():
+        await asyncio.sleep(0.05)
+        revision.update(answer="first", status=revisions.VERIFYING)
+
+    asyncio.get_running_loop().create_task(answer_later())
+    await asyncio.wait_for(revision.wait_for_change(after_version=0, timeout=5), 1)
+
+    assert revision.version == 1
+    assert revision.initial_answer == "first"
+
+
+@pytest.mark.asyncio
+async def test_wait_gives_up_after_its_timeout():
+    revision = Revision()
+
+    await revision.wait_for_change(after_version=0, timeout=0.05)
+
+    assert revision.version == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_at_once_for_seen_or_finished_revisions():
+    revision = Revision()
+    revision.update(answer="first")
+
+    await asyncio.wait_for(revision.wait_for_change(after_version=0, timeout=5), 0.5)
+
+    revision.update(finished=True)
+    await asyncio.wait_for(revision.wait_for_change(after_version=99, timeout=5), 0.5)
+
+
+def test_unchanged_update_keeps_the_version():
+    revision = Revision()
+    revision.update(answer="first")
+    revision.update(answer="first")
+
+    assert revision.version == 1
+
+
+@pytest.mark.asyncio
+async def test_store_waits_on_local_revisions():
+    store = RevisionStore(ttl_seconds=60, max_entries=10, persist=False)
+    revision = store.create()
+
+    asyncio.get_running_loop().call_later(0.05, lambda: revision.update(answer="first"))
+    state = await store.wait(revision.id, after_version=0, timeout=5)
+
+    assert state["answer"] == "first"
+    assert await store.wait("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_other_workers_follow_stored_revisions(revisions_db):
+    owner = RevisionStore(ttl_seconds=60, max_entries=10)
+    # Stands in for another worker: it has no revision in memory
+    other = RevisionStore(ttl_seconds=60, max_entries=10)
+    revision = owner.create()
+    revision.update(answer="first", status=revisions.VERIFYING)
+    owner.flush()
+
+    state = await other.wait(revision.id)
+    assert state["answer"] == "first"
+
+    def finish():
+        revision.update(answer="corrected", status=revisions.CORRECTED, finished=True)
+
+    asyncio.get_running_loop().call_later(0.05, finish)
+    state = await other.wait(revision.id, after_version=state["version"], timeout=5)
+
+    assert state["finished"] is True
+    assert state["answer"] == "corrected"
+    assert state["initial_answer"] == "first"
+    assert await other.wait("unknown") is None
+
+
+def stored_state(revision_id: str, version: int) -> dict:
+    return {
+        "revision_id": revision_id,
+        "version": version,
+        "status": revisions.VERIFYING,
+        "answer": f"answer {version}",
+        "initial_answer": "answer 1",
+        "verdict_ok": None,
+        "issues": None,
+        "error": None,
+        "finished": False,
+    }
+
+
+def test_older_versions_never_replace_newer_ones(revisions_db):
+    revision_id = uuid.uuid4().hex
+    revisions.write_revision(stored_state(revision_id, 2), time.time())
+    revisions.write_revision(stored_state(revision_id, 1), time.time())
+
+    assert revisions.read_revision(revision_id)["answer"] == "answer 2"
+
+
+def test_concurrent_writes_and_reads_lose_no_revisions(revisions_db):
+    revision_ids = [uuid.uuid4().hex for _ in range(200)]
+
+    def write_and_read(revision_id):
+        for version in (1, 2):
+            revisions.write_revision(stored_state(revision_id, version), time.time())
+        return revisions.read_revision(revision_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        states = list(pool.map(write_and_read, revision_ids))
+
+    assert [state["version"] for state in states] == [2] * len(revision_ids)
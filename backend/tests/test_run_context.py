@@ -0,0 +1,74 @@
+import pytest
+
+from app.graph.run_context import RunContext
+from app.llm.local_llm import GenerationCancelled
+
+
+def test_cancel_stops_the_run_at_its_next_check():
+    context = RunContext()
+    context.raise_if_cancelled()
+
+    context.cancel()
+
+    assert context.cancelled
+    with pytest.raises(GenerationCancelled):
+        context.raise_if_cancelled()
+
+
+def test_listeners_see_progress_and_their_errors_are_contained():
+    context = RunContext()
+    seen = []
+
+    def broken(run):
+        raise RuntimeError("listener failed")
+
+    context.add_listener(broken)
+    context.add_listener(lambda run: seen.append(run.answer))
+    context.answer = "draft"
+    context.notify()
+
+    assert seen == ["draft"]
+
+
+def test_usage_is_taken_once():
+    context = RunContext()
+    context.record_usage(10, 5, stage="reason", model="model", seconds=0.123456)
+
+    assert context.take_usage() == 15
+    assert context.take_usage() == 0
+    assert context.generations == [{
+        "stage": "reason",
+        "model": "model",
+        "prompt_tokens": 10,
+        "completion_tokens": 5,
+        "seconds": 0.1235,
+    }]
+
+
+def test_done_callbacks_bill_usage_recorded_after_the_response():
+    context = RunContext()
+    charged = []
+    context.record_usage(10, 5)
+    context.take_usage()
+    context.add_done_callback(lambda run: charged.append(run.take_usage()))
+
+    # A cancelled stream reports its usage when it closes
+    context.record_usage(3, 2)
+    assert charged == []
+
+    context.mark_done()
+    assert charged == [5]
+
+    # Usage recorded by an abandoned node after the graph returned
+    context.record_usage(1, 1)
+    assert charged == [5, 2]
+
+
+def test_done_callback_added_late_runs_at_once():
+    context = RunContext()
+    context.mark_done()
+    calls = []
+
+    context.add_done_callback(calls.append)
+
+    assert calls == [context]
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+
+import pytest
+
+from app import metrics, shared_state
+from app.config import WORKER_STALE_SECONDS
+from app.database import SessionLocal, init_db
+
+
+@pytest.fixture(scope="module")
+def database_path():
+    init_db()
+    return shared_state._sqlite_path()
+
+
+def bump(key: str, commit: bool = True) -> None:
+    db = SessionLocal()
+    try:
+        shared_state.bump_version(db, key)
+        if commit:
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def test_bump_version_is_seen_after_commit_only(database_path):
+    before = shared_state.get_version("test_bump")
+
+    bump("test_bump", commit=False)
+    assert shared_state.get_version("test_bump") == before
+
+    bump("test_bump")
+    bump("test_bump")
+    assert shared_state.get_version("test_bump") == before + 2
+
+
+def test_versioned_cache_reloads_after_a_bump(database_path):
+    cache = shared_state.VersionedCache("test_cache")
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get("item", loader) == 1
+    assert cache.get("item", loader) == 1
+
+    bump("test_cache")
+
+    assert cache.get("item", loader) == 2
+    assert len(loads) == 2
+
+
+def test_versioned_cache_does_not_keep_failures(database_path):
+    cache = shared_state.VersionedCache("test_cache_failure")
+
+    def failing():
+        raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get("item", failing)
+    assert cache.get("item", lambda: "loaded") == "loaded"
+
+
+def test_watcher_picks_up_versions_written_by_other_workers(database_path):
+    watcher = shared_state._Watcher(database_path, interval=60)
+    connection = sqlite3.connect(database_path)
+    other_worker = sqlite3.connect(database_path)
+    try:
+        watcher.poll(connection)
+        with other_worker:
+            other_worker.execute(
+                "INSERT INTO state_versions (key, version) VALUES ('test_remote', 7) "
+                "ON CONFLICT (key) DO UPDATE SET version = 7"
+            )
+
+        watcher.poll(connection)
+
+        assert shared_state.get_version("test_remote") == 7
+    finally:
+        connection.close()
+        other_worker.close()
+
+
+def test_flush_deletes_rows_of_workers_that_are_gone(database_path):
+    watcher = shared_state._Watcher(database_path, interval=60)
+    connection = sqlite3.connect(database_path)
+    try:
+        with connection:
+            connection.execute("DELETE FROM worker_metrics")
+            connection.executemany(
+                "INSERT INTO worker_metrics (worker_id, name, value, updated_at) "
+                "VALUES (?, 'test.counter', ?, ?)",
+                [
+                    ("restarted:1:1", 100, time.time() - WORKER_STALE_SECONDS - 1),
+                    ("running:2:2", 5, time.time()),
+                ],
+            )
+        metrics.incr("test.counter", 1)
+
+        watcher.flush_metrics(connection)
+
+        workers = {
+            row[0] for row in connection.execute("SELECT DISTINCT worker_id FROM worker_metrics")
+        }
+        assert workers == {"running:2:2", shared_state.WORKER_ID}
+        summed = shared_state.aggregate_metrics()
+        assert summed["workers"] == 2
+        assert summed["counters"]["test.counter"] == 5 + metrics.snapshot()["test.counter"]
+    finally:
+        connection.close()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.graph.single_flight import FlightTimeout, SingleFlight, normalize_query
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  What  is\tPython? ") == normalize_query("what is python?")
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_execution():
+    flights = SingleFlight("test_flight")
+    calls = []
+
+    async def work(context):
+        calls.append(context)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["result"] * 3
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_execution_running_for_others():
+    flights = SingleFlight("test_flight")
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def work(context):
+        started.set()
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(flights.do("key", work))
+    await started.wait()
+    second = asyncio.create_task(flights.do("key", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    release.set()
+
+    assert await second == ("result", True)
+
+
+@pytest.mark.asyncio
+async def test_execution_is_cancelled_with_its_last_waiter():
+    flights = SingleFlight("test_flight")
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work(context):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flights.do("key", work))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_the_flight_context():
+    flights = SingleFlight("test_flight")
+    context = {"answer": "partial"}
+
+    async def work(context):
+        await asyncio.sleep(10)
+
+    with pytest.raises(FlightTimeout) as excinfo:
+        await flights.do("key", work, context_factory=lambda: context, timeout=0.05)
+
+    assert excinfo.value.context is context
+    # The only waiter gave up, so a new call starts a fresh execution
+    assert flights.in_flight() == 0
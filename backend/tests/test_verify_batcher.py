@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+
+from app.graph.run_context import RunContext
+from app.graph.verify_batcher import VerificationBatcher
+from app.llm.local_llm import GenerationCancelled
+
+
+def verify_concurrently(batcher, items):
+    """
+    Call batcher.verify for every (answer, context) at once.
+    Returns each call's verdict or exception, in order.
+    """
+    results = [None] * len(items)
+
+    def call(position, answer, context):
+        try:
+            results[position] = batcher.verify(answer, system_prompt="check", context=context)
+        except Exception as e:
+            results[position] = e
+
+    threads = [
+        threading.Thread(target=call, args=(position, answer, context))
+        for position, (answer, context) in enumerate(items)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class Verifiers:
+    """
+    Stand-in verifier and batch verifier recording their calls.
+    """
+
+    def __init__(self, batch_verdicts=None, batch_error=None):
+        self.single_calls = []
+        self.batch_calls = []
+        self.batch_verdicts = batch_verdicts
+        self.batch_error = batch_error
+
+    def verifier(self, query, context=None, system_prompt=None):
+        self.single_calls.append(query.prompt)
+        if query.prompt == "unverifiable":
+            raise RuntimeError("verifier failed")
+        return {"ok": query.prompt.startswith("good"), "answer": query.prompt}
+
+    def batch_verifier(self, answers, context=None, system_prompt=None):
+        self.batch_calls.append(list(answers))
+        context.record_usage(30, 3)
+        if self.batch_error is not None:
+            raise self.batch_error
+        if self.batch_verdicts is not None:
+            return list(self.batch_verdicts)
+        return [{"ok": answer.startswith("good"), "answer": answer} for answer in answers]
+
+
+@pytest.fixture
+def verifiers(fake_agents):
+    def install(**options):
+        stand_in = Verifiers(**options)
+        fake_agents("verifier", stand_in.verifier)
+        fake_agents("batch_verifier", stand_in.batch_verifier)
+        return stand_in
+
+    return install
+
+
+def test_concurrent_answers_share_one_call_and_get_their_own_verdicts(verifiers):
+    stand_in = verifiers()
+    batcher = VerificationBatcher(window_seconds=0.5, max_batch_size=3)
+    contexts = [RunContext() for _ in range(3)]
+
+    results = verify_concurrently(batcher, list(zip(["good 1", "bad 2", "good 3"], contexts)))
+
+    assert len(stand_in.batch_calls) == 1
+    assert sorted(stand_in.batch_calls[0]) == ["bad 2", "good 1", "good 3"]
+    assert [result["answer"] for result in results] == ["good 1", "bad 2", "good 3"]
+    assert [result["ok"] for result in results] == [True, False, True]
+    # Usage is split across the batch
+    assert sum(context.prompt_tokens for context in contexts) == 30
+    assert sum(context.completion_tokens for context in contexts) == 3
+    assert batcher.stats()["batch_sizes"] == {3: 1}
+
+
+def test_missing_verdicts_are_verified_individually(verifiers):
+    stand_in = verifiers(batch_verdicts=[{"ok": True, "answer": "batched"}, None])
+    batcher = VerificationBatcher(window_seconds=0.5, max_batch_size=2)
+
+    results = verify_concurrently(batcher, [("good a", RunContext()), ("good b", RunContext())])
+
+    assert len(stand_in.single_calls) == 1
+    unanswered = stand_in.batch_calls[0][1]
+    assert stand_in.single_calls == [unanswered]
+    assert sorted(result["answer"] for result in results) == sorted(["batched", unanswered])
+
+
+def test_one_failed_fallback_does_not_fail_the_batch(verifiers):
+    verifiers(batch_verdicts=[None, None, None])
+    batcher = VerificationBatcher(window_seconds=0.5, max_batch_size=3)
+    cancelled = RunContext()
+    cancelled.cancel()
+
+    results = verify_concurrently(batcher, [
+        ("good", RunContext()),
+        ("skipped", cancelled),
+        ("unverifiable", RunContext()),
+    ])
+
+    assert results[0]["ok"] is True
+    assert isinstance(results[1], GenerationCancelled)
+    assert isinstance(results[2], RuntimeError)
+
+
+def test_cancelled_member_is_not_verified_again(verifiers):
+    stand_in = verifiers(batch_verdicts=[None, None])
+    batcher = VerificationBatcher(window_seconds=0.5, max_batch_size=2)
+    cancelled = RunContext()
+    cancelled.cancel()
+
+    verify_concurrently(batcher, [("good", RunContext()), ("cancelled", cancelled)])
+
+    assert stand_in.single_calls == ["good"]
+
+
+def test_failed_batch_call_fails_every_answer(verifiers):
+    verifiers(batch_error=RuntimeError("model unavailable"))
+    batcher = VerificationBatcher(window_seconds=0.5, max_batch_size=2)
+
+    results = verify_concurrently(batcher, [("good a", RunContext()), ("good b", RunContext())])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batching_disabled_verifies_directly(verifiers):
+    stand_in = verifiers()
+    batcher = VerificationBatcher(window_seconds=0, max_batch_size=8)
+
+    assert batcher.verify("good", context=RunContext())["ok"] is True
+    assert stand_in.single_calls == ["good"]
+    assert stand_in.batch_calls == []
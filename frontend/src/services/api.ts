@@ -2,12 +2,28 @@ import axios, { AxiosRequestConfig } from 'axios';
 
 export interface PromptRequest {
   query: string;
+  optimistic?: boolean;
 }
 
 export interface Response {
   answer: string;
   mode: string;
   latency_seconds: number;
+  verified?: boolean;
+  partial?: boolean;
+  revision_id?: string | null;
+}
+
+export interface IRevision {
+  revision_id: string;
+  version: number;
+  status: 'pending' | 'verifying' | 'verified' | 'corrected' | 'unverified' | 'failed';
+  answer: string | null;
+  initial_answer: string | null;
+  verdict_ok: boolean | null;
+  issues: string | null;
+  error: string | null;
+  finished: boolean;
 }
 
 // Prompt Management Interfaces
@@ -54,6 +70,25 @@ export interface IPromptActivateResponse {
   message: string;
 }
 
+export interface IHistoryEntry {
+  id: number;
+  session_id: string | null;
+  query: string;
+  answer: string;
+  verdict_ok: boolean | null;
+  verdict_issues: string | null;
+  verified: boolean;
+  partial: boolean;
+  latency_seconds: number;
+  mode: string;
+  created_at: string;
+}
+
+export interface IHistoryPage {
+  items: IHistoryEntry[];
+  next_cursor: number | null;
+}
+
 const headers:HeadersInit = {
   'Content-Type': 'application/json',
   'Access-Control-Allow-Origin': '*', // Allow all origins for CORS
@@ -145,6 +180,57 @@ const activatePrompt = async (id: number): Promise<IPromptActivateResponse> => {
   return response.data;
 };
 
+// Optimistic answers: the first answer comes back right away, then the
+// verified or corrected answer through its revision
+const askOptimisticAPI = async (query: string): Promise<Response> => {
+  const request: PromptRequest = { query, optimistic: true };
+  const response = await client.post<Response>('/prompt', request);
+  if (response.statusText !== 'OK') {
+    throw new Error('Prompt API request failed');
+  }
+  return response.data;
+};
+
+// Long-polls until the revision is newer than `afterVersion` or finished
+const getRevision = async (revisionId: string, afterVersion?: number): Promise<IRevision> => {
+  const params = new URLSearchParams();
+  if (afterVersion !== undefined) params.append('after_version', afterVersion.toString());
+
+  const response = await client.get<IRevision>(`/revisions/${revisionId}?${params.toString()}`);
+  if (response.statusText !== 'OK') {
+    throw new Error('Failed to fetch revision');
+  }
+  return response.data;
+};
+
+const watchRevision = (revisionId: string, onUpdate: (revision: IRevision) => void): WebSocket => {
+  const socket = new WebSocket(`${request.baseURL!.replace(/^http/, 'ws')}/ws/revisions/${revisionId}`);
+  socket.onmessage = (event) => onUpdate(JSON.parse(event.data) as IRevision);
+  return socket;
+};
+
+// Query History API Functions
+// History is only kept for clients sending an allowed API key
+const getHistory = async (
+  apiKey: string,
+  before?: number,
+  limit: number = 20,
+  sessionId?: string,
+): Promise<IHistoryPage> => {
+  const params = new URLSearchParams();
+  if (before !== undefined) params.append('before', before.toString());
+  if (sessionId) params.append('session_id', sessionId);
+  params.append('limit', limit.toString());
+
+  const response = await client.get<IHistoryPage>(`/history?${params.toString()}`, {
+    headers: { 'X-API-Key': apiKey },
+  });
+  if (response.statusText !== 'OK') {
+    throw new Error('Failed to fetch history');
+  }
+  return response.data;
+};
+
 export { 
   usePromptQuestionAPI, 
   useGetHealthAPI,
@@ -154,4 +240,8 @@ export {
   updatePrompt,
   deletePrompt,
   activatePrompt,
+  getHistory,
+  askOptimisticAPI,
+  getRevision,
+  watchRevision,
 };